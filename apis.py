@@ -1,18 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Security
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Security
 from sqlmodel import select, Session
-from models import User, Task, UserTaskLink
+from sqlalchemy.exc import IntegrityError
+from models import User, Task
+from clients import Client
+from schemas import UserRead, TaskRead
+from sqlalchemy.orm import joinedload, selectinload
 from database import get_session
 from pydantic import BaseModel
 from jose import JWTError, jwt
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta
+import uuid
 from typing import Optional, List
+from auth_cache import token_cache
+from revocation import revoked_tokens
+from ratelimit import user_limiter, login_limiter, route_key, client_ip
+from jobs import job_queue, JobAccepted, job_accepted
+from migrations import unique_enforced, missing_unique
+from logging_config import get_logger
+from passwords import DUMMY_HASH, hash_password_async, verify_password_async, needs_rehash, login_admission
+from fastapi.concurrency import run_in_threadpool
 
 router = APIRouter()
+logger = get_logger("auth")
 
 SECRET_KEY = "supersecretkey"  # Cambia esto en producción
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = 7
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
@@ -23,43 +38,79 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    print(f"Datos a codificar en token: {to_encode}")
+    # jti: identificador para poder revocar el token (logout, rotación del refresh)
+    to_encode.setdefault("jti", uuid.uuid4().hex)
+    to_encode.setdefault("type", "access")
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    print(f"Token creado: {encoded_jwt}")
+    logger.debug("Token creado", extra={"sub": to_encode.get("sub"), "exp": expire.isoformat()})
     return encoded_jwt
 
-def get_current_user(token: str = Security(oauth2_scheme), session: Session = Depends(get_session)):
-    print(f"Token recibido: {token}")
-    credentials_exception = HTTPException(
+def credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudo validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def decode_access_token(token: str, token_type: str = "access") -> dict:
     try:
-        print(f"Intentando decodificar token con SECRET_KEY: {SECRET_KEY}")
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print(f"Payload decodificado: {payload}")
         user_id_str: str = payload.get("sub")
-        print(f"User ID extraído (string): {user_id_str}")
         if user_id_str is None:
-            print("User ID es None")
-            raise credentials_exception
-        user_id: int = int(user_id_str)
-        print(f"User ID convertido a int: {user_id}")
+            logger.info("Token sin sub")
+            raise credentials_exception()
+        # Los tokens emitidos antes de los refresh tokens no llevan "type": son de acceso
+        if payload.get("type", "access") != token_type:
+            logger.info("Tipo de token incorrecto", extra={"type": payload.get("type")})
+            raise credentials_exception()
+        if revoked_tokens.is_revoked(payload.get("jti")):
+            logger.info("Token revocado", extra={"jti": payload.get("jti")})
+            raise credentials_exception()
+        payload["user_id"] = int(user_id_str)
     except JWTError as e:
-        print(f"Error JWT: {e}")
-        raise credentials_exception
+        logger.info("Token inválido: %s", e)
+        raise credentials_exception()
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error inesperado: {e}")
-        raise credentials_exception
-    
-    user = session.get(User, user_id)
-    print(f"Usuario encontrado: {user}")
+        logger.warning("Error inesperado al decodificar token: %s", e)
+        raise credentials_exception()
+    return payload
+
+def get_current_user(token: str = Security(oauth2_scheme), session: Session = Depends(get_session)):
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+    payload = decode_access_token(token)
+    user = session.get(User, payload["user_id"])
     if user is None:
-        print("Usuario no encontrado en la base de datos")
-        raise credentials_exception
+        logger.info("Token de un usuario inexistente", extra={"user_id": payload["user_id"]})
+        raise credentials_exception()
+    token_cache.set(token, user, exp=payload.get("exp"), jti=payload.get("jti"))
     return user
 
+async def limited_user(request: Request, current_user: User = Depends(get_current_user)):
+    # get_current_user + token bucket por usuario y ruta (429 al agotarse)
+    await user_limiter.check_async(f"{current_user.id}:{route_key(request)}")
+    return current_user
+
+def create_refresh_token(user_id: int) -> str:
+    return create_access_token(data={"sub": str(user_id), "type": "refresh"}, expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+
+def issue_tokens(user_id: int) -> dict:
+    access_token = create_access_token(data={"sub": str(user_id)}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    return {"access_token": access_token, "refresh_token": create_refresh_token(user_id), "token_type": "bearer"}
+
+def revoke_tokens(access_token: str, refresh_token: Optional[str], user_id: int):
+    # Logout: el access token en uso y, si se envía, el refresh token del mismo usuario
+    payload = decode_access_token(access_token)
+    revoked_tokens.revoke(payload.get("jti"), payload.get("exp"))
+    token_cache.invalidate_token(access_token)
+    if refresh_token:
+        refresh = decode_access_token(refresh_token, token_type="refresh")
+        if refresh["user_id"] == user_id:
+            revoked_tokens.revoke(refresh.get("jti"), refresh.get("exp"))
+
 @router.get("/")
 def root():
     return {"message": "Hola desde FastAPI"}
@@ -67,25 +118,118 @@ def root():
 @router.get("/health")
 def health_check(session: Session = Depends(get_session)):
     try:
-        # Verificar si la tabla Cliente existe
-        result = session.exec(select(Cliente).limit(1)).all()
-        return {"status": "healthy", "message": "Base de datos funcionando correctamente", "tabla_clientes": "existe"}
+        # Verificar si la tabla Client existe
+        result = session.exec(select(Client).limit(1)).all()
+        return {"status": "healthy", "message": "Base de datos funcionando correctamente", "tabla_clientes": "existe",
+                "indices_unicos_pendientes": missing_unique}
     except Exception as e:
         return {"status": "unhealthy", "message": f"Error en base de datos: {str(e)}", "tabla_clientes": "no existe"}
 
-@router.post("/users")
-def create_user(user: User, session: Session = Depends(get_session)):
+@router.get("/auth/cache-stats")
+def auth_cache_stats(current_user: User = Depends(get_current_user)):
+    return token_cache.stats()
+
+def email_taken_query(model, index_name: str, email: str, exclude_id: Optional[int] = None):
+    # Con el índice único la restricción detecta el duplicado (None: sin consulta previa). Si falta
+    # porque la base ya tiene emails repetidos (ver migrations.py), se comprueba antes de escribir
+    if unique_enforced(index_name):
+        return None
+    statement = select(model.id).where(model.email == email)
+    if exclude_id is not None:
+        statement = statement.where(model.id != exclude_id)
+    return statement.limit(1)
+
+EMAIL_UNIQUE_INDEXES = {"user": "ix_user_email", "client": "ix_client_email"}
+
+def is_duplicate_email(e: IntegrityError) -> bool:
+    # Sólo la violación de ix_user_email / ix_client_email (un NOT NULL u otra restricción no lo es).
+    # SQLite: "UNIQUE constraint failed: user.email", MariaDB: "Duplicate entry '...' for key 'ix_user_email'"
+    message = str(e.orig)
+    if message.startswith("UNIQUE constraint failed:"):
+        return any(f"{table}.email" in message for table in EMAIL_UNIQUE_INDEXES)
+    return "Duplicate entry" in message and any(index in message for index in EMAIL_UNIQUE_INDEXES.values())
+
+@router.post("/users", response_model=UserRead)
+async def create_user(user: User, session: Session = Depends(get_session)):
+    taken = email_taken_query(User, "ix_user_email", user.email)
+    if taken is not None and await run_in_threadpool(lambda: session.exec(taken).first()) is not None:
+        raise HTTPException(status_code=400, detail="Ya existe un User con ese email")
+    user.password = await hash_password_async(user.password)
+    try:
+        user = await run_in_threadpool(_save_user, session, user)
+    except IntegrityError as e:
+        await run_in_threadpool(session.rollback)
+        if is_duplicate_email(e):
+            raise HTTPException(status_code=400, detail="Ya existe un User con ese email")
+        raise
+    return to_user_read(user, include_tasks=False)
+
+def _save_user(session: Session, user: User):
     session.add(user)
     session.commit()
     session.refresh(user)
     return user
 
-@router.get("/users/{user_id}/tasks")
+MAX_USERS_PER_REQUEST = 500
+
+def to_task_read(task: Task) -> TaskRead:
+    return TaskRead(id=task.id, title=task.title, description=task.description)
+
+def to_user_read(user: User, include_tasks: bool = True) -> UserRead:
+    tasks = [to_task_read(t) for t in user.tasks] if include_tasks else []
+    return UserRead(id=user.id, name=user.name, email=user.email, tasks=tasks)
+
+def user_with_tasks_query(user_id: int):
+    # Una sola consulta (LEFT OUTER JOIN) para el usuario y sus tareas
+    return select(User).where(User.id == user_id).options(joinedload(User.tasks))
+
+def users_with_tasks_query(user_ids: List[int], include_tasks: bool = True):
+    # Número de consultas constante: usuarios + (opcional) un SELECT ... IN con todas sus tareas
+    statement = select(User).where(User.id.in_(user_ids)).order_by(User.id)
+    if include_tasks:
+        statement = statement.options(selectinload(User.tasks))
+    return statement
+
+def task_with_users_query(task_id: int):
+    return select(Task).where(Task.id == task_id).options(joinedload(Task.users))
+
+def get_user_with_tasks(session: Session, user_id: int) -> Optional[User]:
+    return session.exec(user_with_tasks_query(user_id)).unique().first()
+
+def get_users_with_tasks(session: Session, user_ids: List[int], include_tasks: bool = True) -> List[User]:
+    return session.exec(users_with_tasks_query(user_ids, include_tasks)).all()
+
+def parse_ids(ids: str) -> List[int]:
+    try:
+        user_ids = sorted({int(value) for value in ids.split(",") if value.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids debe ser una lista de enteros separados por comas")
+    if len(user_ids) > MAX_USERS_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAX_USERS_PER_REQUEST} ids por petición")
+    return user_ids
+
+@router.get("/users", response_model=List[UserRead])
+def get_users(ids: str, include: Optional[str] = None, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    include_tasks = include == "tasks"
+    users = get_users_with_tasks(session, parse_ids(ids), include_tasks)
+    return [to_user_read(user, include_tasks) for user in users]
+
+@router.get("/users/{user_id}", response_model=UserRead)
+def get_user(user_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    user = get_user_with_tasks(session, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return to_user_read(user)
+
+@router.get("/users/{user_id}/tasks", response_model=List[TaskRead])
 def get_user_tasks(user_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    user = session.get(User, user_id)
+    user = get_user_with_tasks(session, user_id)
     if not user:
-        return {"error": "Usuario no encontrado"}
-    return user.tasks
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return [to_task_read(t) for t in user.tasks]
+
+def get_task_with_users(session: Session, task_id: int) -> Optional[Task]:
+    return session.exec(task_with_users_query(task_id)).unique().first()
 
 @router.post("/tasks")
 def create_task(task: Task, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
@@ -94,26 +238,24 @@ def create_task(task: Task, session: Session = Depends(get_session), current_use
     session.refresh(task)
     return task
 
-@router.get("/tasks/{task_id}/user")
+@router.get("/tasks/{task_id}/user", response_model=Optional[UserRead])
 def get_task_user(task_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    task = session.get(Task, task_id)
+    task = get_task_with_users(session, task_id)
     if not task:
-        return {"error": "Tarea no encontrada"}
-    return task.user
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return to_user_read(task.users[0], include_tasks=False) if task.users else None
 
-@router.post("/assign-task")
-def assign_task_to_user(user_id: int, task_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    link = UserTaskLink(user_id=user_id, task_id=task_id)
-    session.add(link)
-    session.commit()
-    return {"message": f"Tarea {task_id} asignada al usuario {user_id}"}
+@router.post("/assign-task", status_code=202, response_model=JobAccepted)
+def assign_task_to_user(user_id: int, task_id: int, response: Response, current_user: User = Depends(get_current_user)):
+    # Escritura diferida (ver jobs.py): las asignaciones en ráfaga se insertan en un solo INSERT
+    return job_accepted(job_queue.assign_tasks([(user_id, task_id)]), response, f"Asignación de la tarea {task_id} al usuario {user_id} en cola")
 
-@router.get("/tasks/{task_id}/users")
+@router.get("/tasks/{task_id}/users", response_model=List[UserRead])
 def get_task_users(task_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    task = session.get(Task, task_id)
+    task = get_task_with_users(session, task_id)
     if not task:
-        return {"error": "Tarea no encontrada"}
-    return task.users
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return [to_user_read(user, include_tasks=False) for user in task.users]
 
 class LoginRequest(BaseModel):
     email: str
@@ -121,17 +263,45 @@ class LoginRequest(BaseModel):
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
 @router.post("/login", response_model=Token)
-def login(request: LoginRequest, session: Session = Depends(get_session)):
-    print(request)
-    user = session.exec(select(User).where(User.email == request.email)).first()
-    if not user or user.password != request.password:
-        raise HTTPException(status_code=401, detail="Credenciales incorrectas")
-    access_token = create_access_token(data={"sub": str(user.id)}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    return {"access_token": access_token, "token_type": "bearer"}
+async def login(request: LoginRequest, http_request: Request, session: Session = Depends(get_session)):
+    logger.debug("Login", extra={"email": request.email})
+    await login_limiter.check_async(client_ip(http_request))
+    # El hash corre en passwords.hash_executor y la consulta en el threadpool:
+    # el event loop queda libre, y login_admission acota los logins en curso
+    async with login_admission():
+        user = await run_in_threadpool(lambda: session.exec(select(User).where(User.email == request.email)).first())
+        valid = await verify_password_async(request.password, user.password if user else DUMMY_HASH)
+        if not user or not valid:
+            logger.info("Login fallido", extra={"email": request.email})
+            raise HTTPException(status_code=401, detail="Credenciales incorrectas")
+        if needs_rehash(user.password):
+            # Migración transparente: texto plano o factor de trabajo antiguo -> hash actual
+            user.password = await hash_password_async(request.password)
+            await run_in_threadpool(_save_user, session, user)
+    return issue_tokens(user.id)
+
+@router.post("/refresh", response_model=Token)
+def refresh(request: RefreshRequest, session: Session = Depends(get_session)):
+    payload = decode_access_token(request.refresh_token, token_type="refresh")
+    # Rotación: cada refresh token sirve una sola vez. revoke() es atómico; si dos
+    # peticiones llegan con el mismo token, sólo la primera lo revoca y continúa
+    if not revoked_tokens.revoke(payload.get("jti"), payload.get("exp")):
+        raise credentials_exception()
+    if session.get(User, payload["user_id"]) is None:
+        raise credentials_exception()
+    return issue_tokens(payload["user_id"])
 
 @router.post("/logout")
-def logout(current_user: User = Depends(get_current_user)):
+def logout(request: Optional[LogoutRequest] = None, token: str = Security(oauth2_scheme), current_user: User = Depends(get_current_user)):
+    revoke_tokens(token, request.refresh_token if request else None, current_user.id)
     return {"message": "Logout exitoso"} 
\ No newline at end of file
@@ -0,0 +1,405 @@
+# Variantes async de los routers de usuarios, clientes y productos.
+# app.py las monta en lugar de las sync cuando DB_ASYNC está activo.
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Security
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import select, Session
+from sqlalchemy.exc import IntegrityError
+from sqlmodel.ext.asyncio.session import AsyncSession  # requiere greenlet (modo async)
+from datetime import datetime
+from typing import List, Optional
+
+from models import User, Task
+from clients import Client
+from products import Product
+from database import engine, get_async_session
+from auth_cache import token_cache
+from revocation import revoked_tokens
+from ratelimit import user_limiter, login_limiter, route_key, client_ip
+from passwords import DUMMY_HASH, hash_password_async, verify_password_async, needs_rehash, login_admission
+from apis import (
+    oauth2_scheme, credentials_exception, decode_access_token,
+    LoginRequest, Token, RefreshRequest, LogoutRequest, issue_tokens, revoke_tokens, is_duplicate_email, email_taken_query,
+    to_user_read, to_task_read, parse_ids, user_with_tasks_query, users_with_tasks_query, task_with_users_query,
+)
+from schemas import UserRead, TaskRead
+from apisclients import ClientCreate, ClientUpdate, client_update_data, ClientOrder, ClientBulkRequest, bulk_clients, DUPLICATE_EMAIL
+from apisproducts import ProductCreate, ProductUpdate, ProductOrder, ProductBulkRequest, bulk_products
+from bulk import BulkResponse
+from cache import client_cache, product_cache
+from jobs import job_queue, IdList, JobAccepted, JobStatus, check_ids, job_accepted, get_job_status
+from product_search import ProductFilters, ProductSearchPage, ProductSort, search_products
+from product_facets import ProductFacets, facet_values, get_facets, product_facets
+from migrations import missing_unique
+from pagination import paginate
+from fast_json import columns, rows_response
+from export import export_response, ExportFormat
+
+router_async = APIRouter()
+router_clients_async = APIRouter()
+router_products_async = APIRouter()
+
+
+async def get_current_user_async(token: str = Security(oauth2_scheme), session: AsyncSession = Depends(get_async_session)):
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+    payload = decode_access_token(token)
+    user = await session.get(User, payload["user_id"])
+    if user is None:
+        raise credentials_exception()
+    token_cache.set(token, user, exp=payload.get("exp"), jti=payload.get("jti"))
+    return user
+
+
+async def limited_user_async(request: Request, current_user: User = Depends(get_current_user_async)):
+    await user_limiter.check_async(f"{current_user.id}:{route_key(request)}")
+    return current_user
+
+
+def _with_sync_session(fn, *args):
+    # Operaciones por lotes: reutilizan la implementación sync en el threadpool
+    with Session(engine) as session:
+        return fn(session, *args)
+
+
+# ---------------------------------------------------------------- usuarios
+
+@router_async.get("/")
+async def root():
+    return {"message": "Hola desde FastAPI"}
+
+@router_async.get("/health")
+async def health_check(session: AsyncSession = Depends(get_async_session)):
+    try:
+        # Verificar si la tabla Client existe
+        await session.exec(select(Client).limit(1))
+        return {"status": "healthy", "message": "Base de datos funcionando correctamente", "tabla_clientes": "existe",
+                "indices_unicos_pendientes": missing_unique}
+    except Exception as e:
+        return {"status": "unhealthy", "message": f"Error en base de datos: {str(e)}", "tabla_clientes": "no existe"}
+
+@router_async.get("/auth/cache-stats")
+async def auth_cache_stats(current_user: User = Depends(get_current_user_async)):
+    return token_cache.stats()
+
+@router_async.post("/users", response_model=UserRead)
+async def create_user(user: User, session: AsyncSession = Depends(get_async_session)):
+    taken = email_taken_query(User, "ix_user_email", user.email)
+    if taken is not None and (await session.exec(taken)).first() is not None:
+        raise HTTPException(status_code=400, detail="Ya existe un User con ese email")
+    user.password = await hash_password_async(user.password)
+    session.add(user)
+    try:
+        await session.commit()
+    except IntegrityError as e:
+        await session.rollback()
+        if is_duplicate_email(e):
+            raise HTTPException(status_code=400, detail="Ya existe un User con ese email")
+        raise
+    await session.refresh(user)
+    return to_user_read(user, include_tasks=False)
+
+@router_async.get("/users", response_model=List[UserRead])
+async def get_users(ids: str, include: Optional[str] = None, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_user_async)):
+    include_tasks = include == "tasks"
+    result = await session.exec(users_with_tasks_query(parse_ids(ids), include_tasks))
+    return [to_user_read(user, include_tasks) for user in result.all()]
+
+@router_async.get("/users/{user_id}", response_model=UserRead)
+async def get_user(user_id: int, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_user_async)):
+    result = await session.exec(user_with_tasks_query(user_id))
+    user = result.unique().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return to_user_read(user)
+
+@router_async.get("/users/{user_id}/tasks", response_model=List[TaskRead])
+async def get_user_tasks(user_id: int, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_user_async)):
+    result = await session.exec(user_with_tasks_query(user_id))
+    user = result.unique().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return [to_task_read(t) for t in user.tasks]
+
+@router_async.post("/tasks")
+async def create_task(task: Task, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_user_async)):
+    session.add(task)
+    await session.commit()
+    await session.refresh(task)
+    return task
+
+@router_async.get("/tasks/{task_id}/user", response_model=Optional[UserRead])
+async def get_task_user(task_id: int, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_user_async)):
+    result = await session.exec(task_with_users_query(task_id))
+    task = result.unique().first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return to_user_read(task.users[0], include_tasks=False) if task.users else None
+
+@router_async.post("/assign-task", status_code=202, response_model=JobAccepted)
+async def assign_task_to_user(user_id: int, task_id: int, response: Response, current_user: User = Depends(get_current_user_async)):
+    job = await run_in_threadpool(job_queue.assign_tasks, [(user_id, task_id)])
+    return job_accepted(job, response, f"Asignación de la tarea {task_id} al usuario {user_id} en cola")
+
+@router_async.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str, current_user: User = Depends(get_current_user_async)):
+    return await run_in_threadpool(get_job_status, job_id)
+
+@router_async.get("/tasks/{task_id}/users", response_model=List[UserRead])
+async def get_task_users(task_id: int, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_user_async)):
+    result = await session.exec(task_with_users_query(task_id))
+    task = result.unique().first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return [to_user_read(user, include_tasks=False) for user in task.users]
+
+@router_async.post("/login", response_model=Token)
+async def login(request: LoginRequest, http_request: Request, session: AsyncSession = Depends(get_async_session)):
+    await login_limiter.check_async(client_ip(http_request))
+    async with login_admission():
+        result = await session.exec(select(User).where(User.email == request.email))
+        user = result.first()
+        valid = await verify_password_async(request.password, user.password if user else DUMMY_HASH)
+        if not user or not valid:
+            raise HTTPException(status_code=401, detail="Credenciales incorrectas")
+        if needs_rehash(user.password):
+            user.password = await hash_password_async(request.password)
+            session.add(user)
+            await session.commit()
+    return issue_tokens(user.id)
+
+@router_async.post("/refresh", response_model=Token)
+async def refresh(request: RefreshRequest, session: AsyncSession = Depends(get_async_session)):
+    payload = decode_access_token(request.refresh_token, token_type="refresh")
+    # revoke() escribe en el store compartido (Redis): fuera del event loop
+    if not await run_in_threadpool(revoked_tokens.revoke, payload.get("jti"), payload.get("exp")):
+        raise credentials_exception()
+    if await session.get(User, payload["user_id"]) is None:
+        raise credentials_exception()
+    return issue_tokens(payload["user_id"])
+
+@router_async.post("/logout")
+async def logout(request: Optional[LogoutRequest] = None, token: str = Security(oauth2_scheme), current_user: User = Depends(get_current_user_async)):
+    await run_in_threadpool(revoke_tokens, token, request.refresh_token if request else None, current_user.id)
+    return {"message": "Logout exitoso"}
+
+
+# ---------------------------------------------------------------- clientes
+
+@router_clients_async.post("/clients", response_model=Client)
+async def create_client(client_data: ClientCreate, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(limited_user_async)):
+    taken = email_taken_query(Client, "ix_client_email", client_data.email)
+    if taken is not None and (await session.exec(taken)).first() is not None:
+        raise HTTPException(status_code=400, detail=DUPLICATE_EMAIL)
+    try:
+        db_client = Client(
+            **client_data.dict(exclude={"fecha_creacion", "fecha_actualizacion"}),
+            fecha_creacion=datetime.now().isoformat(),
+            fecha_actualizacion=datetime.now().isoformat()
+        )
+        session.add(db_client)
+        await session.commit()
+        await session.refresh(db_client)
+        return db_client
+    except IntegrityError as e:
+        await session.rollback()
+        if is_duplicate_email(e):
+            raise HTTPException(status_code=400, detail=DUPLICATE_EMAIL)
+        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+
+@router_clients_async.post("/clients/bulk", response_model=BulkResponse)
+async def create_clients_bulk(bulk: ClientBulkRequest, current_user: User = Depends(limited_user_async)):
+    return await run_in_threadpool(_with_sync_session, bulk_clients, bulk)
+
+@router_clients_async.put("/clients/{client_id}", response_model=Client)
+async def update_client(client_id: int, client_update: ClientUpdate, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(limited_user_async)):
+    client_db = await session.get(Client, client_id)
+    if not client_db:
+        raise HTTPException(status_code=404, detail="Client no encontrado")
+    if client_update.email:
+        taken = email_taken_query(Client, "ix_client_email", client_update.email, exclude_id=client_id)
+        if taken is not None and (await session.exec(taken)).first() is not None:
+            raise HTTPException(status_code=400, detail=DUPLICATE_EMAIL)
+    update_data = client_update_data(client_update)
+    for field, value in update_data.items():
+        setattr(client_db, field, value)
+    session.add(client_db)
+    try:
+        await session.commit()
+    except IntegrityError as e:
+        await session.rollback()
+        if is_duplicate_email(e):
+            raise HTTPException(status_code=400, detail=DUPLICATE_EMAIL)
+        raise
+    await client_cache.invalidate_async(client_id)
+    await session.refresh(client_db)
+    return client_db
+
+@router_clients_async.get("/clients", response_model=List[Client])
+async def get_Clients(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, activo: Optional[bool] = None, order_by: ClientOrder = "id", session: AsyncSession = Depends(get_async_session), current_user: User = Depends(limited_user_async)):
+    statement = select(*columns(Client))
+    if activo is not None:
+        statement = statement.where(Client.activo == activo)
+    return rows_response(await session.exec(paginate(statement, Client, limit, skip=skip, cursor=cursor, order_by=order_by)), order_by, limit)
+
+@router_clients_async.get("/clients/export")
+async def export_Clients(format: ExportFormat = "ndjson", activo: Optional[bool] = None, current_user: User = Depends(limited_user_async)):
+    return export_response(Client, format=format, activo=activo)
+
+@router_clients_async.get("/clients/activos", response_model=List[Client])
+async def get_Clients_activos(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, order_by: ClientOrder = "id", session: AsyncSession = Depends(get_async_session), current_user: User = Depends(limited_user_async)):
+    return await get_Clients(skip=skip, limit=limit, cursor=cursor, activo=True, order_by=order_by, session=session, current_user=current_user)
+
+@router_clients_async.get("/clients/{client_id}", response_model=Client)
+async def get_Client(client_id: int, request: Request, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(limited_user_async)):
+    async def load():
+        client = await session.get(Client, client_id)
+        if not client:
+            raise HTTPException(status_code=404, detail="Client no encontrado")
+        return client
+    return await client_cache.response_async(request, client_id, load)
+
+@router_clients_async.delete("/clients/{client_id}")
+async def delete_Client(client_id: int, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(limited_user_async)):
+    client = await session.get(Client, client_id)
+    if not client:
+        raise HTTPException(status_code=404, detail="Client no encontrado")
+    await session.delete(client)
+    await session.commit()
+    await client_cache.invalidate_async(client_id)
+    return {"message": "Client eliminado exitosamente"}
+
+@router_clients_async.post("/clients/bulk/activar", status_code=202, response_model=JobAccepted)
+async def activar_Clients(body: IdList, response: Response, current_user: User = Depends(limited_user_async)):
+    check_ids(body.ids)
+    job = await run_in_threadpool(job_queue.set_activo, Client, body.ids, True)
+    return job_accepted(job, response, "Activación de Clients en cola")
+
+@router_clients_async.post("/clients/bulk/desactivar", status_code=202, response_model=JobAccepted)
+async def desactivar_Clients(body: IdList, response: Response, current_user: User = Depends(limited_user_async)):
+    check_ids(body.ids)
+    job = await run_in_threadpool(job_queue.set_activo, Client, body.ids, False)
+    return job_accepted(job, response, "Desactivación de Clients en cola")
+
+@router_clients_async.post("/clients/{client_id}/activar", status_code=202, response_model=JobAccepted)
+async def activar_Client(client_id: int, response: Response, current_user: User = Depends(limited_user_async)):
+    job = await run_in_threadpool(job_queue.set_activo, Client, [client_id], True)
+    return job_accepted(job, response, "Activación de Client en cola")
+
+@router_clients_async.post("/clients/{client_id}/desactivar", status_code=202, response_model=JobAccepted)
+async def desactivar_Client(client_id: int, response: Response, current_user: User = Depends(limited_user_async)):
+    job = await run_in_threadpool(job_queue.set_activo, Client, [client_id], False)
+    return job_accepted(job, response, "Desactivación de Client en cola")
+
+
+# ---------------------------------------------------------------- productos
+
+@router_products_async.post("/products", response_model=Product)
+async def create_Product(product_data: ProductCreate, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(limited_user_async)):
+    try:
+        db_product = Product(
+            **product_data.dict(),
+            fecha_creacion=datetime.now().isoformat(),
+            fecha_actualizacion=datetime.now().isoformat()
+        )
+        session.add(db_product)
+        facets_since = product_facets.begin()
+        await session.commit()
+        await session.refresh(db_product)
+        product_facets.apply(facets_since, new=facet_values(db_product))
+        return db_product
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+
+@router_products_async.post("/products/bulk", response_model=BulkResponse)
+async def create_Products_bulk(bulk: ProductBulkRequest, current_user: User = Depends(limited_user_async)):
+    return await run_in_threadpool(_with_sync_session, bulk_products, bulk)
+
+@router_products_async.get("/products", response_model=List[Product])
+async def get_Products(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, activo: Optional[bool] = None, order_by: ProductOrder = "id", session: AsyncSession = Depends(get_async_session), current_user: User = Depends(limited_user_async)):
+    statement = select(*columns(Product))
+    if activo is not None:
+        statement = statement.where(Product.activo == activo)
+    return rows_response(await session.exec(paginate(statement, Product, limit, skip=skip, cursor=cursor, order_by=order_by)), order_by, limit)
+
+@router_products_async.get("/products/export")
+async def export_Products(format: ExportFormat = "ndjson", activo: Optional[bool] = None, current_user: User = Depends(limited_user_async)):
+    return export_response(Product, format=format, activo=activo)
+
+@router_products_async.get("/products/activos", response_model=List[Product])
+async def get_Products_activos(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, order_by: ProductOrder = "id", session: AsyncSession = Depends(get_async_session), current_user: User = Depends(limited_user_async)):
+    return await get_Products(skip=skip, limit=limit, cursor=cursor, activo=True, order_by=order_by, session=session, current_user=current_user)
+
+@router_products_async.get("/products/search", response_model=ProductSearchPage)
+async def search_Products(filters: ProductFilters = Depends(), sort: ProductSort = "id", cursor: Optional[str] = None, limit: int = 50, current_user: User = Depends(limited_user_async)):
+    return await run_in_threadpool(_with_sync_session, search_products, filters, sort, cursor, limit)
+
+@router_products_async.get("/products/facets", response_model=ProductFacets)
+async def get_Products_facets(filters: ProductFilters = Depends(), current_user: User = Depends(limited_user_async)):
+    return await run_in_threadpool(_with_sync_session, get_facets, filters)
+
+@router_products_async.get("/products/{product_id}", response_model=Product)
+async def get_Product(product_id: int, request: Request, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(limited_user_async)):
+    async def load():
+        product = await session.get(Product, product_id)
+        if not product:
+            raise HTTPException(status_code=404, detail="Product no encontrado")
+        return product
+    return await product_cache.response_async(request, product_id, load)
+
+@router_products_async.put("/products/{product_id}", response_model=Product)
+async def update_Product(product_id: int, product_update: ProductUpdate, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(limited_user_async)):
+    product = await session.get(Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product no encontrado")
+    old_facets = facet_values(product)
+    update_data = product_update.dict(exclude_unset=True)
+    update_data["fecha_actualizacion"] = datetime.now().isoformat()
+    for field, value in update_data.items():
+        setattr(product, field, value)
+    session.add(product)
+    facets_since = product_facets.begin()
+    await session.commit()
+    await product_cache.invalidate_async(product_id)
+    await session.refresh(product)
+    product_facets.apply(facets_since, old_facets, facet_values(product))
+    return product
+
+@router_products_async.delete("/products/{product_id}")
+async def delete_Product(product_id: int, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(limited_user_async)):
+    product = await session.get(Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product no encontrado")
+    old_facets = facet_values(product)
+    await session.delete(product)
+    facets_since = product_facets.begin()
+    await session.commit()
+    await product_cache.invalidate_async(product_id)
+    product_facets.apply(facets_since, old=old_facets)
+    return {"message": "Product eliminado exitosamente"}
+
+@router_products_async.post("/products/bulk/activar", status_code=202, response_model=JobAccepted)
+async def activar_Products(body: IdList, response: Response, current_user: User = Depends(limited_user_async)):
+    check_ids(body.ids)
+    job = await run_in_threadpool(job_queue.set_activo, Product, body.ids, True)
+    return job_accepted(job, response, "Activación de Products en cola")
+
+@router_products_async.post("/products/bulk/desactivar", status_code=202, response_model=JobAccepted)
+async def desactivar_Products(body: IdList, response: Response, current_user: User = Depends(limited_user_async)):
+    check_ids(body.ids)
+    job = await run_in_threadpool(job_queue.set_activo, Product, body.ids, False)
+    return job_accepted(job, response, "Desactivación de Products en cola")
+
+@router_products_async.post("/products/{product_id}/activar", status_code=202, response_model=JobAccepted)
+async def activar_Product(product_id: int, response: Response, current_user: User = Depends(limited_user_async)):
+    job = await run_in_threadpool(job_queue.set_activo, Product, [product_id], True)
+    return job_accepted(job, response, "Activación de Product en cola")
+
+@router_products_async.post("/products/{product_id}/desactivar", status_code=202, response_model=JobAccepted)
+async def desactivar_Product(product_id: int, response: Response, current_user: User = Depends(limited_user_async)):
+    job = await run_in_threadpool(job_queue.set_activo, Product, [product_id], False)
+    return job_accepted(job, response, "Desactivación de Product en cola")
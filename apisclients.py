@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlmodel import select, Session
+from sqlalchemy.exc import IntegrityError
 from clients import Client
 from database import get_session
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal
 from models import User
-from apis import get_current_user
+from apis import limited_user, is_duplicate_email, email_taken_query
+from migrations import missing_unique
+from pagination import paginate
+from fast_json import columns, rows_response
+from logging_config import get_logger
+from cache import client_cache
+from jobs import job_queue, IdList, JobAccepted, check_ids, job_accepted
+from export import export_response, ExportFormat
+from bulk import BulkMode, BulkResponse, BulkRowResult, BULK_MAX_ITEMS, chunked, insert_many, update_many, build_response
 from pydantic import BaseModel
 from jose import JWTError, jwt
 from fastapi.security import OAuth2PasswordBearer
@@ -21,6 +30,11 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 router_clients = APIRouter()
+logger = get_logger("clients")
+
+ClientOrder = Literal["id", "fecha_actualizacion"]
+
+DUPLICATE_EMAIL = "Ya existe un Client con ese email"
 
 class ClientCreate(BaseModel):
     nombre: str
@@ -32,6 +46,10 @@ class ClientCreate(BaseModel):
     fecha_creacion: Optional[str] = None
     fecha_actualizacion: Optional[str] = None
 
+class ClientBulkRequest(BaseModel):
+    items: List[ClientCreate]
+    mode: BulkMode = "insert"  # "upsert": actualiza los Clients existentes con el mismo email
+
 class ClientUpdate(BaseModel):
     nombre: Optional[str] = None
     email: Optional[str] = None
@@ -40,20 +58,32 @@ class ClientUpdate(BaseModel):
     empresa: Optional[str] = None
     activo: Optional[bool] = None
 
+CLIENT_REQUIRED_FIELDS = ("nombre", "email")
+
+def client_update_data(client_update: ClientUpdate) -> dict:
+    # Campos enviados; nombre y email pueden omitirse pero no ponerse a null (columnas NOT NULL)
+    update_data = client_update.dict(exclude_unset=True)
+    for field in CLIENT_REQUIRED_FIELDS:
+        if field in update_data and update_data[field] is None:
+            raise HTTPException(status_code=422, detail=f"El campo {field} no puede ser nulo")
+    update_data["fecha_actualizacion"] = datetime.now().isoformat()
+    return update_data
+
 @router_clients.get("/health")
 def health_check(session: Session = Depends(get_session)):
     try:
         result = session.exec(select(Client).limit(1)).all()
-        return {"status": "healthy", "message": "Base de datos funcionando correctamente", "tabla_Clients": "existe"}
+        return {"status": "healthy", "message": "Base de datos funcionando correctamente", "tabla_Clients": "existe",
+                "indices_unicos_pendientes": missing_unique}
     except Exception as e:
         return {"status": "unhealthy", "message": f"Error en base de datos: {str(e)}", "tabla_Clients": "no existe"}
 
 @router_clients.post("/clients", response_model=Client)
-def create_client(client_data: ClientCreate, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    print(f"Datos recibidos: {client_data}")
-    existing_client = session.exec(select(Client).where(Client.email == client_data.email)).first()
-    if existing_client:
-        raise HTTPException(status_code=400, detail="Ya existe un Client con ese email")
+def create_client(client_data: ClientCreate, session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
+    # Sin consulta previa: el índice único detecta el email repetido en el propio INSERT
+    taken = email_taken_query(Client, "ix_client_email", client_data.email)
+    if taken is not None and session.exec(taken).first() is not None:
+        raise HTTPException(status_code=400, detail=DUPLICATE_EMAIL)
     try:
         db_client = Client(
             nombre=client_data.nombre,
@@ -65,79 +95,148 @@ def create_client(client_data: ClientCreate, session: Session = Depends(get_sess
             fecha_creacion=datetime.now().isoformat(),
             fecha_actualizacion=datetime.now().isoformat()
         )
-        print(f"Client a crear: {db_client}")
         session.add(db_client)
         session.commit()
         session.refresh(db_client)
+        logger.debug("Client creado", extra={"id": db_client.id})
         return db_client
+    except IntegrityError as e:
+        session.rollback()
+        if is_duplicate_email(e):
+            raise HTTPException(status_code=400, detail=DUPLICATE_EMAIL)
+        logger.exception("Error al crear Client")
+        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
     except Exception as e:
-        print(f"Error al crear Client: {e}")
+        logger.exception("Error al crear Client")
         session.rollback()
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
 
+@router_clients.post("/clients/bulk", response_model=BulkResponse)
+def create_clients_bulk(bulk: ClientBulkRequest, session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
+    return bulk_clients(session, bulk)
+
+def bulk_clients(session: Session, bulk: ClientBulkRequest) -> BulkResponse:
+    if len(bulk.items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Máximo {BULK_MAX_ITEMS} Clients por lote")
+    # Una sola consulta IN (por bloque) para detectar emails ya existentes
+    emails = list({item.email for item in bulk.items})
+    existing = {}
+    for chunk in chunked(emails):
+        existing.update(session.exec(select(Client.email, Client.id).where(Client.email.in_(chunk))).all())
+
+    now = datetime.now().isoformat()
+    results, seen = [], set()
+    to_insert, insert_indexes, to_update = [], [], []
+    for index, item in enumerate(bulk.items):
+        if item.email in seen:
+            results.append(BulkRowResult(index=index, status="duplicate", detail="Email repetido en el lote"))
+            continue
+        seen.add(item.email)
+        row = item.dict(exclude={"fecha_creacion", "fecha_actualizacion"})
+        row["fecha_actualizacion"] = now
+        client_id = existing.get(item.email)
+        if client_id is None:
+            row["fecha_creacion"] = now
+            to_insert.append(row)
+            insert_indexes.append(index)
+        elif bulk.mode == "upsert":
+            row["id"] = client_id
+            to_update.append(row)
+            results.append(BulkRowResult(index=index, status="updated", id=client_id))
+        else:
+            results.append(BulkRowResult(index=index, status="duplicate", id=client_id, detail=DUPLICATE_EMAIL))
+    try:
+        ids = insert_many(session, Client, to_insert)
+        update_many(session, Client, to_update)
+        session.commit()
+        client_cache.invalidate(*(row["id"] for row in to_update))
+    except IntegrityError as e:
+        # Un alta concurrente con el mismo email entre la consulta IN y el INSERT
+        session.rollback()
+        if is_duplicate_email(e):
+            raise HTTPException(status_code=409, detail="Otro proceso dio de alta alguno de estos emails, reintente el lote")
+        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+    results.extend(BulkRowResult(index=index, status="created", id=client_id) for index, client_id in zip(insert_indexes, ids))
+    return build_response(results)
+
 @router_clients.put("/clients/{client_id}", response_model=Client)
-def update_client(client_id: int, client_update: ClientUpdate, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+def update_client(client_id: int, client_update: ClientUpdate, session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
     client_db = session.get(Client, client_id)
     if not client_db:
         raise HTTPException(status_code=404, detail="Client no encontrado")
-    if client_update.email and client_update.email != client_db.email:
-        existing_client = session.exec(select(Client).where(Client.email == client_update.email)).first()
-        if existing_client:
-            raise HTTPException(status_code=400, detail="Ya existe un Client con ese email")
-    update_data = client_update.dict(exclude_unset=True)
-    update_data["fecha_actualizacion"] = datetime.now().isoformat()
+    if client_update.email:
+        taken = email_taken_query(Client, "ix_client_email", client_update.email, exclude_id=client_id)
+        if taken is not None and session.exec(taken).first() is not None:
+            raise HTTPException(status_code=400, detail=DUPLICATE_EMAIL)
+    update_data = client_update_data(client_update)
     for field, value in update_data.items():
         setattr(client_db, field, value)
     session.add(client_db)
-    session.commit()
+    try:
+        session.commit()
+    except IntegrityError as e:
+        session.rollback()
+        if is_duplicate_email(e):
+            raise HTTPException(status_code=400, detail=DUPLICATE_EMAIL)
+        raise
+    client_cache.invalidate(client_id)
     session.refresh(client_db)
     return client_db
 
 @router_clients.get("/clients", response_model=List[Client])
-def get_Clients(skip: int = 0, limit: int = 100, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    Clients = session.exec(select(Client).offset(skip).limit(limit)).all()
-    return Clients
+def get_Clients(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, activo: Optional[bool] = None, order_by: ClientOrder = "id", session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
+    # Filas planas serializadas con orjson: sin instancias ORM ni validación pydantic por fila
+    statement = select(*columns(Client))
+    if activo is not None:
+        statement = statement.where(Client.activo == activo)
+    return rows_response(session.exec(paginate(statement, Client, limit, skip=skip, cursor=cursor, order_by=order_by)), order_by, limit)
+
+@router_clients.get("/clients/export")
+def export_Clients(format: ExportFormat = "ndjson", activo: Optional[bool] = None, current_user: User = Depends(limited_user)):
+    return export_response(Client, format=format, activo=activo)
+
+@router_clients.get("/clients/activos", response_model=List[Client])
+def get_Clients_activos(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, order_by: ClientOrder = "id", session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
+    return get_Clients(skip=skip, limit=limit, cursor=cursor, activo=True, order_by=order_by, session=session, current_user=current_user)
 
 @router_clients.get("/clients/{Client_id}", response_model=Client)
-def get_Client(Client_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    Client = session.get(Client, Client_id)
-    if not Client:
-        raise HTTPException(status_code=404, detail="Client no encontrado")
-    return Client
+def get_Client(Client_id: int, request: Request, session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
+    def load():
+        db_Client = session.get(Client, Client_id)
+        if not db_Client:
+            raise HTTPException(status_code=404, detail="Client no encontrado")
+        return db_Client
+    return client_cache.response(request, Client_id, load)
 
 
 @router_clients.delete("/clients/{Client_id}")
-def delete_Client(Client_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    Client = session.get(Client, Client_id)
-    if not Client:
+def delete_Client(Client_id: int, session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
+    db_Client = session.get(Client, Client_id)
+    if not db_Client:
         raise HTTPException(status_code=404, detail="Client no encontrado")
-    session.delete(Client)
+    session.delete(db_Client)
     session.commit()
+    client_cache.invalidate(Client_id)
     return {"message": "Client eliminado exitosamente"}
 
-@router_clients.get("/clients/activos", response_model=List[Client])
-def get_Clients_activos(skip: int = 0, limit: int = 100, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    Clients = session.exec(select(Client).where(Client.activo == True).offset(skip).limit(limit)).all()
-    return Clients
-
-@router_clients.post("/clients/{Client_id}/activar")
-def activar_Client(Client_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    Client = session.get(Client, Client_id)
-    if not Client:
-        raise HTTPException(status_code=404, detail="Client no encontrado")
-    Client.activo = True
-    Client.fecha_actualizacion = datetime.now().isoformat()
-    session.add(Client)
-    session.commit()
-    return {"message": "Client activado exitosamente"}
+@router_clients.post("/clients/bulk/activar", status_code=202, response_model=JobAccepted)
+def activar_Clients(body: IdList, response: Response, current_user: User = Depends(limited_user)):
+    check_ids(body.ids)
+    return job_accepted(job_queue.set_activo(Client, body.ids, True), response, "Activación de Clients en cola")
 
-@router_clients.post("/clients/{Client_id}/desactivar")
-def desactivar_Client(Client_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    Client = session.get(Client, Client_id)
-    if not Client:
-        raise HTTPException(status_code=404, detail="Client no encontrado")
-    Client.activo = False
-    Client.fecha_actualizacion = datetime.now().isoformat()
-    session.add(Client)
-    session.commit()
-    return {"message": "Client desactivado exitosamente"} 
\ No newline at end of file
+@router_clients.post("/clients/bulk/desactivar", status_code=202, response_model=JobAccepted)
+def desactivar_Clients(body: IdList, response: Response, current_user: User = Depends(limited_user)):
+    check_ids(body.ids)
+    return job_accepted(job_queue.set_activo(Client, body.ids, False), response, "Desactivación de Clients en cola")
+
+# Escritura diferida (ver jobs.py): las ráfagas de activaciones se agrupan en una transacción
+@router_clients.post("/clients/{Client_id}/activar", status_code=202, response_model=JobAccepted)
+def activar_Client(Client_id: int, response: Response, current_user: User = Depends(limited_user)):
+    return job_accepted(job_queue.set_activo(Client, [Client_id], True), response, "Activación de Client en cola")
+
+@router_clients.post("/clients/{Client_id}/desactivar", status_code=202, response_model=JobAccepted)
+def desactivar_Client(Client_id: int, response: Response, current_user: User = Depends(limited_user)):
+    return job_accepted(job_queue.set_activo(Client, [Client_id], False), response, "Desactivación de Client en cola") 
\ No newline at end of file
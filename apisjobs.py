@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Depends
+from models import User
+from apis import get_current_user
+from jobs import JobStatus, get_job_status
+
+router_jobs = APIRouter()
+
+@router_jobs.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str, current_user: User = Depends(get_current_user)):
+    return get_job_status(job_id)
@@ -0,0 +1,63 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from database import engine, async_engine, pool_status
+from auth_cache import token_cache
+from revocation import revoked_tokens
+from ratelimit import user_limiter, login_limiter, admission_stats
+from cache import client_cache, product_cache
+from product_facets import product_facets
+from jobs import job_queue
+from metrics import render_prometheus
+
+router_metrics = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+POOL_GAUGES = ("size", "checked_out", "overflow", "wait_time_max")
+# Sólo crecen: se exportan como counter (nombre_total) para poder usar rate()
+POOL_COUNTERS = {"checkouts": "checkouts", "connects": "connects", "invalidations": "invalidations",
+                 "timeouts": "timeouts", "wait_time_total": "wait_time_seconds"}
+
+def _engines():
+    engines = {"sync": engine}
+    if async_engine is not None:
+        engines["async"] = async_engine.sync_engine
+    return engines
+
+@router_metrics.get("/metrics/pool")
+def get_pool_metrics():
+    return {name: pool_status(bind) for name, bind in _engines().items()}
+
+@router_metrics.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    gauges, counters = {}, {}
+    for name, bind in _engines().items():
+        status = pool_status(bind)
+        for field in POOL_GAUGES:
+            if field in status:
+                gauges.setdefault(f"db_pool_{field}", ("Estado del pool de conexiones", []))[1].append(({"engine": name}, status[field]))
+        for field, metric in POOL_COUNTERS.items():
+            if field in status:
+                counters.setdefault(f"db_pool_{metric}", ("Actividad del pool de conexiones", []))[1].append(({"engine": name}, status[field]))
+    cache = token_cache.stats()
+    gauges["auth_cache_size"] = ("Cache de tokens verificados", [({}, cache["size"])])
+    for field in ("hits", "misses", "evictions"):
+        counters[f"auth_cache_{field}"] = ("Cache de tokens verificados", [({}, cache[field])])
+    for field in ("hits", "misses"):
+        counters[f"record_cache_{field}"] = ("Cache de lectura de registros", [
+            ({"namespace": c.namespace}, c.stats()[field]) for c in (client_cache, product_cache)
+        ])
+    counters["rate_limit_rejected"] = ("Peticiones rechazadas con 429", [
+        ({"limiter": limiter.name}, limiter.rejected) for limiter in (user_limiter, login_limiter)
+    ])
+    counters["admission_rejected"] = ("Peticiones rechazadas con 503 por admisión", [({}, admission_stats["rejected"])])
+    gauges["revoked_tokens"] = ("jti revocados en memoria", [({}, revoked_tokens.stats()["size"])])
+    facets = product_facets.stats()
+    for field in ("hits", "misses", "generation"):
+        counters[f"facet_cache_{field}"] = ("Instantánea de facetas de productos", [({}, facets[field])])
+    jobs = job_queue.stats()
+    for field in ("queued_items", "running_jobs"):
+        gauges[f"jobs_{field}"] = ("Cola de trabajos en segundo plano", [({}, jobs[field])])
+    for field in ("rejected", "batches", "done", "failed"):
+        counters[f"jobs_{field}"] = ("Cola de trabajos en segundo plano", [({}, jobs[field])])
+    return PlainTextResponse(render_prometheus(gauges, counters), media_type=PROMETHEUS_CONTENT_TYPE)
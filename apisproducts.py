@@ -1,29 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlmodel import select, Session
 from products import Product
 from database import get_session
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal
 from models import User
 
-from apis import get_current_user
+from apis import limited_user
+from pagination import paginate
+from fast_json import columns, rows_response
+from logging_config import get_logger
+from cache import product_cache
+from jobs import job_queue, IdList, JobAccepted, check_ids, job_accepted
+from product_search import ProductFilters, ProductSearchPage, ProductSort, search_products
+from product_facets import ProductFacets, facet_values, get_facets, product_facets
+from export import export_response, ExportFormat
+from bulk import BulkMode, BulkResponse, BulkRowResult, BULK_MAX_ITEMS, chunked, insert_many, update_many, build_response
 
 router_products = APIRouter()
+logger = get_logger("products")
+
+ProductOrder = Literal["id", "fecha_actualizacion"]
 
 class ProductCreate(BaseModel):
     nombre: str
-    email: str
-    telefono: Optional[str] = None
-    direccion: Optional[str] = None
-    empresa: Optional[str] = None
+    descripcion: Optional[str] = None
+    categoria: Optional[str] = None
+    subcategoria: Optional[str] = None
+    marca: Optional[str] = None
+    modelo: Optional[str] = None
+    precio: Optional[float] = None
+    activo: bool = True
+
+class ProductBulkItem(ProductCreate):
+    id: Optional[int] = None  # con "upsert", si existe se reemplaza ese Product
+
+class ProductBulkRequest(BaseModel):
+    items: List[ProductBulkItem]
+    mode: BulkMode = "insert"
 
 class ProductUpdate(BaseModel):
     nombre: Optional[str] = None
-    email: Optional[str] = None
-    telefono: Optional[str] = None
-    direccion: Optional[str] = None
-    empresa: Optional[str] = None
+    descripcion: Optional[str] = None
+    categoria: Optional[str] = None
+    subcategoria: Optional[str] = None
+    marca: Optional[str] = None
+    modelo: Optional[str] = None
+    precio: Optional[float] = None
     activo: Optional[bool] = None
 
 @router_products.get("/health")
@@ -35,90 +59,160 @@ def health_check(session: Session = Depends(get_session)):
         return {"status": "unhealthy", "message": f"Error en base de datos: {str(e)}", "tabla_Products": "no existe"}
 
 @router_products.post("/products", response_model=Product)
-def create_Product(Product: ProductCreate, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    print(f"Datos recibidos: {Product}")
-    existing_Product = session.exec(select(Product).where(Product.email == Product.email)).first()
-    if existing_Product:
-        raise HTTPException(status_code=400, detail="Ya existe un Product con ese email")
+def create_Product(product_data: ProductCreate, session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
     try:
         db_Product = Product(
-            nombre=Product.nombre,
-
+            **product_data.dict(),
             fecha_creacion=datetime.now().isoformat(),
             fecha_actualizacion=datetime.now().isoformat()
         )
-        print(f"Product a crear: {db_Product}")
         session.add(db_Product)
+        facets_since = product_facets.begin()
         session.commit()
         session.refresh(db_Product)
+        product_facets.apply(facets_since, new=facet_values(db_Product))
+        logger.debug("Product creado", extra={"id": db_Product.id})
         return db_Product
     except Exception as e:
-        print(f"Error al crear Product: {e}")
+        logger.exception("Error al crear Product")
         session.rollback()
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
 
+@router_products.post("/products/bulk", response_model=BulkResponse)
+def create_Products_bulk(bulk: ProductBulkRequest, session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
+    return bulk_products(session, bulk)
+
+def bulk_products(session: Session, bulk: ProductBulkRequest) -> BulkResponse:
+    if len(bulk.items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Máximo {BULK_MAX_ITEMS} Products por lote")
+    ids = list({item.id for item in bulk.items if item.id is not None})
+    existing = set()
+    for chunk in chunked(ids):
+        existing.update(session.exec(select(Product.id).where(Product.id.in_(chunk))).all())
+
+    now = datetime.now().isoformat()
+    results, seen = [], set()
+    to_insert, insert_indexes, to_update = [], [], []
+    for index, item in enumerate(bulk.items):
+        if item.id is not None and item.id in seen:
+            results.append(BulkRowResult(index=index, status="duplicate", id=item.id, detail="Id repetido en el lote"))
+            continue
+        seen.add(item.id)
+        row = item.dict()
+        row["fecha_actualizacion"] = now
+        if item.id is None or item.id not in existing:
+            if item.id is None:
+                row.pop("id", None)
+            row["fecha_creacion"] = now
+            to_insert.append(row)
+            insert_indexes.append(index)
+        elif bulk.mode == "upsert":
+            to_update.append(row)
+            results.append(BulkRowResult(index=index, status="updated", id=item.id))
+        else:
+            results.append(BulkRowResult(index=index, status="duplicate", id=item.id, detail="Ya existe un Product con ese id"))
+    try:
+        # Filas con id explícito e id autogenerado van en lotes separados (mismas columnas por lote)
+        with_id = [(i, r) for i, r in zip(insert_indexes, to_insert) if "id" in r]
+        without_id = [(i, r) for i, r in zip(insert_indexes, to_insert) if "id" not in r]
+        created = []
+        for group in (with_id, without_id):
+            new_ids = insert_many(session, Product, [r for _, r in group])
+            created.extend(zip([i for i, _ in group], new_ids))
+        update_many(session, Product, to_update)
+        facets_since = product_facets.begin()
+        session.commit()
+        product_cache.invalidate(*(row["id"] for row in to_update))
+        if to_update:
+            product_facets.invalidate()
+        else:
+            for row in to_insert:
+                product_facets.apply(facets_since, new=facet_values(row))
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+    results.extend(BulkRowResult(index=index, status="created", id=product_id) for index, product_id in created)
+    return build_response(results)
+
 @router_products.get("/products", response_model=List[Product])
-def get_Products(skip: int = 0, limit: int = 100, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    Products = session.exec(select(Product).offset(skip).limit(limit)).all()
-    return Products
+def get_Products(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, activo: Optional[bool] = None, order_by: ProductOrder = "id", session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
+    # Filas planas serializadas con orjson: sin instancias ORM ni validación pydantic por fila
+    statement = select(*columns(Product))
+    if activo is not None:
+        statement = statement.where(Product.activo == activo)
+    return rows_response(session.exec(paginate(statement, Product, limit, skip=skip, cursor=cursor, order_by=order_by)), order_by, limit)
+
+@router_products.get("/products/export")
+def export_Products(format: ExportFormat = "ndjson", activo: Optional[bool] = None, current_user: User = Depends(limited_user)):
+    return export_response(Product, format=format, activo=activo)
+
+@router_products.get("/products/activos", response_model=List[Product])
+def get_Products_activos(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, order_by: ProductOrder = "id", session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
+    return get_Products(skip=skip, limit=limit, cursor=cursor, activo=True, order_by=order_by, session=session, current_user=current_user)
+
+@router_products.get("/products/search", response_model=ProductSearchPage)
+def search_Products(filters: ProductFilters = Depends(), sort: ProductSort = "id", cursor: Optional[str] = None, limit: int = 50, session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
+    return search_products(session, filters, sort=sort, cursor=cursor, limit=limit)
+
+@router_products.get("/products/facets", response_model=ProductFacets)
+def get_Products_facets(filters: ProductFilters = Depends(), session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
+    return get_facets(session, filters)
 
 @router_products.get("/products/{Product_id}", response_model=Product)
-def get_Product(Product_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    Product = session.get(Product, Product_id)
-    if not Product:
-        raise HTTPException(status_code=404, detail="Product no encontrado")
-    return Product
+def get_Product(Product_id: int, request: Request, session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
+    def load():
+        db_Product = session.get(Product, Product_id)
+        if not db_Product:
+            raise HTTPException(status_code=404, detail="Product no encontrado")
+        return db_Product
+    return product_cache.response(request, Product_id, load)
 
 @router_products.put("/products/{Product_id}", response_model=Product)
-def update_Product(Product_id: int, Product_update: ProductUpdate, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    Product = session.get(Product, Product_id)
-    if not Product:
+def update_Product(Product_id: int, Product_update: ProductUpdate, session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
+    db_Product = session.get(Product, Product_id)
+    if not db_Product:
         raise HTTPException(status_code=404, detail="Product no encontrado")
-    if Product_update.email and Product_update.email != Product.email:
-        existing_Product = session.exec(select(Product).where(Product.email == Product_update.email)).first()
-        if existing_Product:
-            raise HTTPException(status_code=400, detail="Ya existe un Product con ese email")
+    old_facets = facet_values(db_Product)
     update_data = Product_update.dict(exclude_unset=True)
     update_data["fecha_actualizacion"] = datetime.now().isoformat()
     for field, value in update_data.items():
-        setattr(Product, field, value)
-    session.add(Product)
+        setattr(db_Product, field, value)
+    session.add(db_Product)
+    facets_since = product_facets.begin()
     session.commit()
-    session.refresh(Product)
-    return Product
+    product_cache.invalidate(Product_id)
+    session.refresh(db_Product)
+    product_facets.apply(facets_since, old_facets, facet_values(db_Product))
+    return db_Product
 
 @router_products.delete("/products/{Product_id}")
-def delete_Product(Product_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    Product = session.get(Product, Product_id)
-    if not Product:
+def delete_Product(Product_id: int, session: Session = Depends(get_session), current_user: User = Depends(limited_user)):
+    db_Product = session.get(Product, Product_id)
+    if not db_Product:
         raise HTTPException(status_code=404, detail="Product no encontrado")
-    session.delete(Product)
+    old_facets = facet_values(db_Product)
+    session.delete(db_Product)
+    facets_since = product_facets.begin()
     session.commit()
+    product_cache.invalidate(Product_id)
+    product_facets.apply(facets_since, old=old_facets)
     return {"message": "Product eliminado exitosamente"}
 
-@router_products.get("/products/activos", response_model=List[Product])
-def get_Products_activos(skip: int = 0, limit: int = 100, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    Products = session.exec(select(Product).where(Product.activo == True).offset(skip).limit(limit)).all()
-    return Products
-
-@router_products.post("/products/{Product_id}/activar")
-def activar_Product(Product_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    Product = session.get(Product, Product_id)
-    if not Product:
-        raise HTTPException(status_code=404, detail="Product no encontrado")
-    Product.activo = True
-    Product.fecha_actualizacion = datetime.now().isoformat()
-    session.add(Product)
-    session.commit()
-    return {"message": "Product activado exitosamente"}
+@router_products.post("/products/bulk/activar", status_code=202, response_model=JobAccepted)
+def activar_Products(body: IdList, response: Response, current_user: User = Depends(limited_user)):
+    check_ids(body.ids)
+    return job_accepted(job_queue.set_activo(Product, body.ids, True), response, "Activación de Products en cola")
 
-@router_products.post("/products/{Product_id}/desactivar")
-def desactivar_Product(Product_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    Product = session.get(Product, Product_id)
-    if not Product:
-        raise HTTPException(status_code=404, detail="Product no encontrado")
-    Product.activo = False
-    Product.fecha_actualizacion = datetime.now().isoformat()
-    session.add(Product)
-    session.commit()
-    return {"message": "Product desactivado exitosamente"} 
\ No newline at end of file
+@router_products.post("/products/bulk/desactivar", status_code=202, response_model=JobAccepted)
+def desactivar_Products(body: IdList, response: Response, current_user: User = Depends(limited_user)):
+    check_ids(body.ids)
+    return job_accepted(job_queue.set_activo(Product, body.ids, False), response, "Desactivación de Products en cola")
+
+# Escritura diferida (ver jobs.py): las ráfagas de activaciones se agrupan en una transacción
+@router_products.post("/products/{Product_id}/activar", status_code=202, response_model=JobAccepted)
+def activar_Product(Product_id: int, response: Response, current_user: User = Depends(limited_user)):
+    return job_accepted(job_queue.set_activo(Product, [Product_id], True), response, "Activación de Product en cola")
+
+@router_products.post("/products/{Product_id}/desactivar", status_code=202, response_model=JobAccepted)
+def desactivar_Product(Product_id: int, response: Response, current_user: User = Depends(limited_user)):
+    return job_accepted(job_queue.set_activo(Product, [Product_id], False), response, "Desactivación de Product en cola") 
\ No newline at end of file
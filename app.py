@@ -1,14 +1,31 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from sqlmodel import SQLModel
-from database import engine
+from fastapi.concurrency import run_in_threadpool
+from logging_config import setup_logging
+from database import engine, async_engine, DB_ASYNC
+from metrics import MetricsMiddleware, instrument_engine
+from ratelimit import AdmissionMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 from apis import router as api_router
 from apisclients import router_clients
 from apisproducts import router_products
-from models import User, Task, UserTaskLink 
-from clients import Client
+from apismetrics import router_metrics
+from apisjobs import router_jobs
+from lifecycle import init_db, start_workers, shutdown
 
-app = FastAPI()
+setup_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(init_db)
+    start_workers()
+    yield
+    await shutdown()
+
+app = FastAPI(lifespan=lifespan)
+
+# Dentro de CORS: las respuestas 503 de admisión también llevan sus cabeceras
+app.add_middleware(AdmissionMiddleware)
 
 # Configuración CORS
 app.add_middleware(
@@ -18,12 +35,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+# Último en añadirse = más externo: mide también el coste de CORS
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
 
-app.include_router(api_router)
-app.include_router(router_clients)
-app.include_router(router_products)
-
-@app.on_event("startup")
-def init_db():
-    SQLModel.metadata.create_all(engine)
+if DB_ASYNC:
+    from apis_async import router_async, router_clients_async, router_products_async
+    app.include_router(router_async)
+    app.include_router(router_clients_async)
+    app.include_router(router_products_async)
+else:
+    app.include_router(api_router)
+    app.include_router(router_clients)
+    app.include_router(router_products)
+    app.include_router(router_jobs)
+app.include_router(router_metrics)
@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import event
+
+from models import User
+from revocation import revoked_tokens
+
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))  # segundos
+AUTH_CACHE_MAXSIZE = int(os.getenv("AUTH_CACHE_MAXSIZE", "10000"))
+
+
+class TokenCache:
+    # Cache LRU token -> usuario verificado. Cada entrada vence en
+    # min(ahora + ttl, exp del token) para no aceptar nunca un token expirado,
+    # y un acierto se descarta si su jti está en la lista de revocación.
+
+    def __init__(self, maxsize: int = AUTH_CACHE_MAXSIZE, ttl: float = AUTH_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()  # token -> (expires_at, user_id, user, jti)
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[User]:
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= now or revoked_tokens.is_revoked(entry[3]):
+                del self._data[token]
+                self.misses += 1
+                return None
+            self._data.move_to_end(token)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, token: str, user: User, exp: Optional[float] = None, jti: Optional[str] = None):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        # Copia desacoplada de la sesión: nunca dispara lazy loads fuera de ella
+        cached = User(id=user.id, name=user.name, email=user.email, password=user.password)
+        with self._lock:
+            self._data[token] = (expires_at, user.id, cached, jti)
+            self._data.move_to_end(token)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            stale = [token for token, entry in self._data.items() if entry[1] == user_id]
+            for token in stale:
+                del self._data[token]
+
+    def invalidate_token(self, token: str):
+        with self._lock:
+            self._data.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+token_cache = TokenCache()
+
+
+# Cualquier cambio o borrado de un usuario invalida sus tokens cacheados
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    if target.id is not None:
+        token_cache.invalidate_user(target.id)
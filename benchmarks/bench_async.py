@@ -0,0 +1,59 @@
+# Compara req/s del modo sync (threadpool) contra el modo async (aiosqlite)
+# sobre una copia local de db.db.
+#
+#   python benchmarks/bench_async.py --requests 2000 --concurrency 64
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+from common import temp_database, seed, import_app, asgi_client, login, drive
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+async def run_worker(args):
+    url = args.url if args.mode == "sync" else args.url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    asgi_app = import_app(url)
+    async with asgi_client(asgi_app) as client:
+        headers = await login(client)
+        await drive(client, "GET", "/clients?limit=20", 50, 8, headers=headers)  # warm-up
+        result = await drive(client, "GET", "/clients?limit=20", args.requests, args.concurrency, headers=headers)
+    result.pop("latencies")
+    with open(args.out, "w") as f:
+        json.dump(result, f)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--mode", choices=["sync", "async"])
+    parser.add_argument("--url")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    if args.mode:
+        asyncio.run(run_worker(args))
+        return
+
+    url = temp_database()
+    seed(url, clients=args.clients)
+    out = os.path.join(os.path.dirname(url[len("sqlite:///"):]), "result.json")
+    for mode in ("sync", "async"):
+        # Cada modo en su propio proceso: database.py fija el motor al importarse
+        subprocess.run(
+            [sys.executable, os.path.join(HERE, "bench_async.py"), "--mode", mode, "--url", url, "--out", out,
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency)],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        with open(out) as f:
+            result = json.load(f)
+        print(f"{mode:5}  {result['rps']:8.1f} req/s  errors={result['errors']}  ({args.concurrency} concurrentes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Filas/s al importar Clients: POST /clients fila a fila contra POST /clients/bulk.
+#
+#   python benchmarks/bench_bulk.py --rows 5000 --batch 1000
+import argparse
+import asyncio
+import time
+
+from common import temp_database, seed, import_app, asgi_client, login
+
+
+async def run(args):
+    url = temp_database()
+    seed(url)
+    asgi_app = import_app(url)
+    async with asgi_client(asgi_app) as client:
+        headers = await login(client)
+
+        t0 = time.perf_counter()
+        for i in range(args.single_rows):
+            r = await client.post("/clients", json={"nombre": f"s{i}", "email": f"single{i}@example.com"}, headers=headers)
+            r.raise_for_status()
+        single = args.single_rows / (time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        for start in range(0, args.rows, args.batch):
+            items = [{"nombre": f"b{i}", "email": f"bulk{i}@example.com"} for i in range(start, min(start + args.batch, args.rows))]
+            r = await client.post("/clients/bulk", json={"items": items}, headers=headers)
+            r.raise_for_status()
+        bulk = args.rows / (time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        for start in range(0, args.rows, args.batch):
+            items = [{"nombre": f"u{i}", "email": f"bulk{i}@example.com"} for i in range(start, min(start + args.batch, args.rows))]
+            r = await client.post("/clients/bulk", json={"items": items, "mode": "upsert"}, headers=headers)
+            r.raise_for_status()
+        upsert = args.rows / (time.perf_counter() - t0)
+
+    print(f"POST /clients        {single:10.1f} filas/s  ({args.single_rows} filas)")
+    print(f"POST /clients/bulk   {bulk:10.1f} filas/s  ({args.rows} filas, lotes de {args.batch})")
+    print(f"  mode=upsert        {upsert:10.1f} filas/s")
+    print(f"speedup bulk/single  {bulk / single:10.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--single-rows", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=1000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Ráfaga de activaciones individuales (POST /clients/{id}/desactivar, como las
+# acciones masivas de la UI) con la cola de trabajos: una transacción por
+# operación (JOBS_BATCH_MAX=1, equivalente a la escritura síncrona anterior)
+# frente a agrupar la ráfaga en lotes, más el endpoint bulk con la misma lista.
+#
+#   python benchmarks/bench_jobs.py --clients 100000 --burst 500 --concurrency 32
+import argparse
+import asyncio
+import random
+import time
+
+from common import temp_database, seed, import_app, asgi_client, login, drive, summarize
+
+
+async def drain(job_queue):
+    while True:
+        stats = job_queue.stats()
+        if not stats["queued_items"] and not stats["running_jobs"]:
+            return
+        await asyncio.sleep(0.005)
+
+
+async def burst(client, headers, job_queue, args, batch_max):
+    job_queue.batch_max = batch_max
+    # El worker ya espera en take() con el valor anterior: despertarlo para que lo relea
+    job_queue.broker.wake()
+    await asyncio.sleep(0.05)
+    batches = job_queue.batches
+    ids = random.sample(range(1, args.clients + 1), args.burst)
+    path = iter(f"/clients/{client_id}/desactivar" for client_id in ids)
+    t0 = time.perf_counter()
+    result = await drive(client, "POST", lambda: next(path), args.burst, args.concurrency, headers=headers)
+    accepted = time.perf_counter() - t0
+    await drain(job_queue)
+    return {"accept": summarize(result), "accepted_s": accepted, "applied_s": time.perf_counter() - t0,
+            "transactions": job_queue.batches - batches}
+
+
+async def bulk(client, headers, job_queue, args):
+    ids = random.sample(range(1, args.clients + 1), args.burst)
+    batches = job_queue.batches
+    t0 = time.perf_counter()
+    r = await client.post("/clients/bulk/desactivar", json={"ids": ids}, headers=headers)
+    r.raise_for_status()
+    await drain(job_queue)
+    return {"applied_s": time.perf_counter() - t0, "transactions": job_queue.batches - batches}
+
+
+async def run(args):
+    url = temp_database(copy_from=None)
+    seed(url, clients=args.clients)
+    asgi_app = import_app(url)
+    from lifecycle import init_db
+    from jobs import job_queue, JOBS_BATCH_MAX
+    init_db()
+    job_queue.start()  # httpx no ejecuta el lifespan
+    async with asgi_client(asgi_app) as client:
+        headers = await login(client)
+        await burst(client, headers, job_queue, argparse.Namespace(**{**vars(args), "burst": 50}), JOBS_BATCH_MAX)  # warm-up
+        rows = {
+            "1 transacción por operación": await burst(client, headers, job_queue, args, 1),
+            f"lotes (JOBS_BATCH_MAX={JOBS_BATCH_MAX})": await burst(client, headers, job_queue, args, JOBS_BATCH_MAX),
+        }
+        bulk_row = await bulk(client, headers, job_queue, args)
+    job_queue.stop()
+
+    print(f"{args.burst} desactivaciones, {args.concurrency} concurrentes, {args.clients} clientes")
+    print(f"{'':30} {'req/s':>8} {'p95 ms':>8} {'aplicado s':>11} {'transacciones':>14}")
+    for name, row in rows.items():
+        print(f"{name:30} {row['accept']['rps']:8.1f} {row['accept']['p95_ms']:8.2f} {row['applied_s']:11.2f} {row['transactions']:14d}")
+    print(f"{'POST /clients/bulk/desactivar':30} {'':>8} {'':>8} {bulk_row['applied_s']:11.2f} {bulk_row['transactions']:14d}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--burst", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Throughput de /login con hash PBKDF2 y latencia de GET /clients durante una
+# tormenta de logins (los logins no deben dejar sin servicio al CRUD).
+#
+#   python benchmarks/bench_login.py --logins 200 --concurrency 32
+import argparse
+import asyncio
+import os
+import statistics
+
+from common import temp_database, seed, import_app, asgi_client, login, drive, BENCH_EMAIL, BENCH_PASSWORD
+
+
+def ms(latencies, q):
+    if not latencies:
+        return 0.0
+    return statistics.quantiles(latencies, n=100)[q - 1] * 1000 if len(latencies) > 1 else latencies[0] * 1000
+
+
+async def run(args):
+    url = temp_database()
+    seed(url, clients=1000)
+    asgi_app = import_app(url)
+    async with asgi_client(asgi_app) as client:
+        headers = await login(client)  # migra la contraseña sembrada en texto plano al hash actual
+        body = {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}
+
+        baseline = await drive(client, "GET", "/clients?limit=20", args.crud, 8, headers=headers)
+        storm, during = await asyncio.gather(
+            drive(client, "POST", "/login", args.logins, args.concurrency, json=body),
+            drive(client, "GET", "/clients?limit=20", args.crud, 8, headers=headers),
+        )
+
+    from passwords import PASSWORD_HASH_ITERATIONS, PASSWORD_HASH_WORKERS, LOGIN_MAX_CONCURRENCY
+    print(f"iteraciones={PASSWORD_HASH_ITERATIONS} workers={PASSWORD_HASH_WORKERS} max_logins={LOGIN_MAX_CONCURRENCY}")
+    print(f"POST /login          {storm['rps']:8.1f} logins/s  p50={ms(storm['latencies'], 50):7.1f}ms  "
+          f"p95={ms(storm['latencies'], 95):7.1f}ms  rechazados={storm['errors']}")
+    print(f"GET /clients aislado p50={ms(baseline['latencies'], 50):7.1f}ms  p95={ms(baseline['latencies'], 95):7.1f}ms")
+    print(f"GET /clients+logins  p50={ms(during['latencies'], 50):7.1f}ms  p95={ms(during['latencies'], 95):7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--crud", type=int, default=500)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Latencia de GET /products/search sobre un catálogo generado (1M productos por
+# defecto), con y sin los índices compuestos de Product.
+#
+#   python benchmarks/bench_search.py --rows 1000000 --repeat 20
+import argparse
+import asyncio
+import statistics
+import time
+
+from common import temp_database, seed, import_app, asgi_client, login
+
+QUERIES = {
+    "categoria+precio (orden precio)": "/products/search?categoria=cat7&precio_min=100&precio_max=200&sort=precio",
+    "marca+precio (orden precio)": "/products/search?marca=marca3&precio_max=50&sort=precio",
+    "subcategoria (orden id)": "/products/search?categoria=cat7&subcategoria=sub27",
+    "texto completo": "/products/search?q=producto%2099999",
+    "texto+categoria": "/products/search?q=descripción&categoria=cat3&sort=precio",
+    "activo (orden precio)": "/products/search?activo=true&sort=precio",
+}
+
+
+async def measure(client, headers, repeat):
+    results = {}
+    for name, path in QUERIES.items():
+        # Segunda página por cursor: confirma que las páginas siguientes cuestan lo mismo
+        first = await client.get(path, headers=headers)
+        first.raise_for_status()
+        cursor = first.json()["next_cursor"]
+        latencies = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            r = await client.get(path + (f"&cursor={cursor}" if cursor else ""), headers=headers)
+            latencies.append(time.perf_counter() - t0)
+            r.raise_for_status()
+        results[name] = statistics.median(latencies) * 1000
+    return results
+
+
+async def run(args):
+    url = temp_database(copy_from=None)
+    t0 = time.perf_counter()
+    seed(url, products=args.rows)
+    print(f"sembrados {args.rows} productos en {time.perf_counter() - t0:.1f}s")
+    asgi_app = import_app(url)
+
+    from database import engine
+    from products import Product
+    from product_search import ensure_fulltext_index
+
+    t0 = time.perf_counter()
+    ensure_fulltext_index(engine)
+    print(f"índice FTS5 construido en {time.perf_counter() - t0:.1f}s")
+
+    async with asgi_client(asgi_app) as client:
+        headers = await login(client)
+        with_index = await measure(client, headers, args.repeat)
+        without_index = None
+        if not args.skip_no_index:
+            indexes = [index for index in Product.__table__.indexes if index.name.startswith("ix_product_") and index.name != "ix_product_fulltext"]
+            with engine.begin() as conn:
+                for index in indexes:
+                    index.drop(conn)
+            without_index = await measure(client, headers, max(3, args.repeat // 5))
+
+    print(f"{'consulta':34} {'con índices':>12} {'sin índices':>12}   (mediana ms, {args.rows} filas)")
+    for name in QUERIES:
+        other = f"{without_index[name]:12.2f}" if without_index else f"{'-':>12}"
+        print(f"{name:34} {with_index[name]:12.2f} {other}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--skip-no-index", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# Coste de serializar páginas de GET /clients y GET /products (100 y 1000 filas),
+# peticiones secuenciales contra la app in-process.
+#
+#   python benchmarks/bench_serialization.py --repeat 200
+import argparse
+import asyncio
+import statistics
+import time
+
+from common import temp_database, seed, import_app, asgi_client, login
+
+PATHS = ["/clients?limit=100", "/clients?limit=1000", "/products?limit=100", "/products?limit=1000",
+         "/clients/activos?limit=1000"]
+
+
+async def run(args):
+    url = temp_database(copy_from=None)
+    seed(url, clients=5000, products=5000)
+    asgi_app = import_app(url)
+    async with asgi_client(asgi_app) as client:
+        headers = await login(client)
+        print(f"{'ruta':30} {'mediana ms':>11} {'req/s':>8}  bytes")
+        for path in PATHS:
+            repeat = args.repeat if "limit=100" in path and "limit=1000" not in path else max(10, args.repeat // 5)
+            for _ in range(5):
+                await client.get(path, headers=headers)  # warm-up
+            latencies = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                r = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - t0)
+                r.raise_for_status()
+            median = statistics.median(latencies)
+            print(f"{path:30} {median * 1000:11.2f} {1 / median:8.1f}  {len(r.content)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Latencia de POST /login y POST /clients con 1M usuarios y 1M clientes, con
+# los índices únicos de email y sin ellos (consulta previa por email como hacía
+# el alta antes), y carrera de altas concurrentes con el mismo email.
+#
+#   python benchmarks/bench_unique.py --rows 1000000 --repeat 50
+import argparse
+import asyncio
+import statistics
+import time
+
+from common import temp_database, seed, import_app, asgi_client, login, BENCH_EMAIL, BENCH_PASSWORD
+
+
+def median_ms(latencies):
+    return statistics.median(latencies) * 1000
+
+
+async def measure(client, headers, repeat, label):
+    body = {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}
+    logins, creates = [], []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        r = await client.post("/login", json=body)
+        logins.append(time.perf_counter() - t0)
+        r.raise_for_status()
+        t0 = time.perf_counter()
+        r = await client.post("/clients", json={"nombre": "Nuevo", "email": f"{label}{i}@example.com"}, headers=headers)
+        creates.append(time.perf_counter() - t0)
+        r.raise_for_status()
+    t0 = time.perf_counter()
+    r = await client.post("/clients", json={"nombre": "Repetido", "email": "cliente7@example.com"}, headers=headers)
+    duplicate = time.perf_counter() - t0
+    return {"login": median_ms(logins), "create": median_ms(creates), "duplicate": duplicate * 1000, "duplicate_status": r.status_code}
+
+
+def precheck_ms(engine, repeat):
+    # La consulta que hacía el alta antes de insertar (check-then-insert)
+    from sqlmodel import Session, select
+    from clients import Client
+    latencies = []
+    with Session(engine) as session:
+        for i in range(repeat):
+            t0 = time.perf_counter()
+            session.exec(select(Client).where(Client.email == f"nadie{i}@example.com")).first()
+            latencies.append(time.perf_counter() - t0)
+    return median_ms(latencies)
+
+
+async def race(client, headers, concurrency):
+    # Altas simultáneas con el mismo email: debe crearse exactamente una
+    body = {"nombre": "Carrera", "email": "carrera@example.com"}
+    responses = await asyncio.gather(*(client.post("/clients", json=body, headers=headers) for _ in range(concurrency)))
+    return sorted(r.status_code for r in responses)
+
+
+async def run(args):
+    url = temp_database(copy_from=None)
+    t0 = time.perf_counter()
+    seed(url, clients=args.rows, users=args.rows)
+    print(f"sembrados {args.rows} clientes y {args.rows} usuarios en {time.perf_counter() - t0:.1f}s")
+    asgi_app = import_app(url)
+
+    from database import engine
+    from clients import Client
+    from models import User
+
+    async with asgi_client(asgi_app) as client:
+        headers = await login(client)  # migra la contraseña sembrada al hash actual
+        with_index = await measure(client, headers, args.repeat, "con")
+        with_index["precheck"] = precheck_ms(engine, args.repeat)
+        statuses = await race(client, headers, args.race)
+
+        unique_indexes = [index for table in (Client.__table__, User.__table__) for index in table.indexes if index.unique]
+        with engine.begin() as conn:
+            for index in unique_indexes:
+                index.drop(conn)
+        repeat = max(5, args.repeat // 5)
+        without_index = await measure(client, headers, repeat, "sin")
+        without_index["precheck"] = precheck_ms(engine, repeat)
+
+    print(f"{'':38} {'con índice':>12} {'sin índice':>12}   (mediana ms, {args.rows} filas)")
+    print(f"{'POST /login':38} {with_index['login']:12.2f} {without_index['login']:12.2f}")
+    print(f"{'POST /clients (alta)':38} {with_index['create']:12.2f} {without_index['create']:12.2f}")
+    print(f"{'  consulta previa por email (antes)':38} {with_index['precheck']:12.2f} {without_index['precheck']:12.2f}")
+    print(f"{'POST /clients (email repetido)':38} {with_index['duplicate']:12.2f} {'-':>12}   -> {with_index['duplicate_status']}")
+    print(f"carrera ({args.race} altas con el mismo email): "
+          f"{statuses.count(200)} creada(s), {statuses.count(400)} rechazadas, otros={[s for s in statuses if s not in (200, 400)]}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--race", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Compara req/s de un proceso uvicorn contra gunicorn con N workers uvicorn,
+# con servidores reales escuchando en TCP sobre una copia de db.db.
+#
+#   python benchmarks/bench_workers.py --workers 4 --requests 4000 --concurrency 64
+#
+# El generador de carga corre en la misma máquina: en hosts con pocos núcleos
+# compite por CPU con los workers.
+import argparse
+import asyncio
+import os
+import sys
+
+from common import temp_database, seed, login, drive, start_server, stop_server
+
+
+async def measure(port, path, requests, concurrency):
+    import httpx
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        headers = await login(client)
+        await drive(client, "GET", path, 200, concurrency, headers=headers)  # warm-up
+        return await drive(client, "GET", path, requests, concurrency, headers=headers)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--path", default="/clients?limit=20")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    url = temp_database()
+    seed(url, clients=1000)
+    # Keep-alive largo en ambos: evita que el servidor cierre conexiones que el cliente está reutilizando
+    setups = {
+        "uvicorn (1 proceso)": [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.port), "--no-access-log",
+                                "--timeout-keep-alive", "75"],
+        f"gunicorn ({args.workers} workers)": [sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py",
+                                                "--workers", str(args.workers), "--bind", f"127.0.0.1:{args.port}",
+                                                "--keep-alive", "75"],
+    }
+    print(f"GET {args.path}  {args.requests} peticiones, {args.concurrency} concurrentes, {os.cpu_count()} CPU")
+    for name, cmd in setups.items():
+        process = start_server(cmd, url, args.port, PASSWORD_HASH_ITERATIONS=1000)
+        try:
+            result = asyncio.run(measure(args.port, args.path, args.requests, args.concurrency))
+        finally:
+            stop_server(process)
+        latencies = result["latencies"]
+        print(f"{name:24} {result['rps']:8.1f} req/s  p50={percentile(latencies, 0.5):6.1f}ms  "
+              f"p99={percentile(latencies, 0.99):6.1f}ms  errors={result['errors']}  exit={process.returncode}")
+
+
+if __name__ == "__main__":
+    main()
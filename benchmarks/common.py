@@ -0,0 +1,165 @@
+# Utilidades compartidas por los benchmarks: base temporal, datos de prueba,
+# un cliente HTTP in-process contra la app ASGI y servidores locales reales.
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+
+
+def temp_database(copy_from=os.path.join(ROOT, "db.db")):
+    # Copia de db.db (o base vacía) en un directorio temporal: nunca se toca la base del repo
+    tmpdir = tempfile.mkdtemp(prefix="bench-")
+    path = os.path.join(tmpdir, "db.db")
+    if copy_from and os.path.exists(copy_from):
+        shutil.copy(copy_from, path)
+    return "sqlite:///" + path
+
+
+def seed(url, clients=0, products=0, users=1, tasks=0, tasks_per_user=0, batch=10000):
+    from sqlmodel import SQLModel, create_engine
+    from models import User, Task, UserTaskLink
+    from clients import Client
+    from products import Product
+
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    now = datetime.now().isoformat()
+    with engine.begin() as conn:
+        if users:
+            conn.execute(User.__table__.insert(), [
+                {"name": "bench", "email": BENCH_EMAIL if i == 0 else f"bench{i}@example.com", "password": BENCH_PASSWORD}
+                for i in range(users)
+            ])
+        if tasks:
+            conn.execute(Task.__table__.insert(), [
+                {"title": f"Tarea {i}", "description": f"Descripción {i}"} for i in range(tasks)
+            ])
+        if tasks_per_user:
+            user_ids = [row[0] for row in conn.execute(User.__table__.select().with_only_columns(User.id))]
+            task_ids = [row[0] for row in conn.execute(Task.__table__.select().with_only_columns(Task.id))]
+            conn.execute(UserTaskLink.__table__.insert(), [
+                {"user_id": user_id, "task_id": task_ids[(n + k) % len(task_ids)]}
+                for n, user_id in enumerate(user_ids) for k in range(min(tasks_per_user, len(task_ids)))
+            ])
+        for start in range(0, clients, batch):
+            conn.execute(Client.__table__.insert(), [
+                {"nombre": f"Cliente {i}", "email": f"cliente{i}@example.com", "telefono": "555-0100",
+                 "empresa": f"Empresa {i % 500}", "activo": i % 5 != 0,
+                 "fecha_creacion": now, "fecha_actualizacion": now}
+                for i in range(start, min(start + batch, clients))
+            ])
+        for start in range(0, products, batch):
+            conn.execute(Product.__table__.insert(), [
+                {"nombre": f"Producto {i}", "descripcion": f"Descripción del producto {i}",
+                 "categoria": f"cat{i % 20}", "subcategoria": f"sub{i % 100}", "marca": f"marca{i % 50}",
+                 "modelo": f"m{i}", "precio": float(i % 1000) + 0.99, "activo": i % 7 != 0,
+                 "fecha_creacion": now, "fecha_actualizacion": now}
+                for i in range(start, min(start + batch, products))
+            ])
+    engine.dispose()
+
+
+def import_app(url, **env):
+    # database.py lee la configuración al importarse: fijar el entorno antes
+    os.environ["DATABASE_URL"] = url
+    # Los benchmarks miden la app, no los límites: rate limiting y admisión desactivados salvo que se pidan
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "none")
+    os.environ.setdefault("ADMISSION_MAX_IN_FLIGHT", "0")
+    for key, value in env.items():
+        os.environ[key] = str(value)
+    import app
+    return app.app
+
+
+async def login(client, email=BENCH_EMAIL, password=BENCH_PASSWORD):
+    r = await client.post("/login", json={"email": email, "password": password})
+    r.raise_for_status()
+    return {"Authorization": "Bearer " + r.json()["access_token"]}
+
+
+def asgi_client(asgi_app):
+    import httpx
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi_app), base_url="http://bench")
+
+
+async def drive(client, method, path, total, concurrency, **kwargs):
+    # Lanza `total` peticiones con `concurrency` en vuelo; devuelve latencias en segundos.
+    # `path` y los valores de kwargs pueden ser funciones sin argumentos para variar
+    # la URL o el cuerpo en cada petición
+    import asyncio
+
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            t0 = time.perf_counter()
+            request_kwargs = {key: value() if callable(value) else value for key, value in kwargs.items()}
+            r = await client.request(method, path() if callable(path) else path, **request_kwargs)
+            latencies.append(time.perf_counter() - t0)
+            if r.status_code >= 400:
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    return {"requests": total, "errors": errors, "elapsed": elapsed,
+            "rps": total / elapsed if elapsed else 0.0, "latencies": latencies}
+
+
+def summarize(result):
+    # req/s y percentiles (ms) de un resultado de drive()
+    latencies = sorted(result["latencies"])
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": result["requests"], "errors": result["errors"], "rps": round(result["rps"], 1),
+        "p50_ms": round(cuts[49] * 1000, 2), "p95_ms": round(cuts[94] * 1000, 2), "p99_ms": round(cuts[98] * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def start_server(cmd, url, port, **env):
+    # Lanza un servidor (uvicorn o gunicorn) contra `url` y espera a que responda
+    import httpx
+
+    env = dict(os.environ, DATABASE_URL=url, LOG_LEVEL="WARNING", **{k: str(v) for k, v in env.items()})
+    env.setdefault("RATE_LIMIT_BACKEND", "none")
+    env.setdefault("ADMISSION_MAX_IN_FLIGHT", "0")
+    env.pop("DB_SCHEMA_READY", None)
+    log = open(os.path.join(os.path.dirname(url.split(":///", 1)[1]), "server.log"), "w+")
+    process = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    process.log = log
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.kill()
+    log.seek(0)
+    raise RuntimeError("El servidor no arrancó: " + log.read()[-2000:])
+
+
+def stop_server(process):
+    # SIGTERM: parada ordenada (drenado + lifespan shutdown)
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=40)
+    except subprocess.TimeoutExpired:
+        process.kill()
+    process.log.close()
@@ -0,0 +1,195 @@
+# Suite de carga: siembra una base temporal con volúmenes realistas, lanza
+# tráfico autenticado concurrente contra cada endpoint y guarda req/s y
+# latencias p50/p95/p99 en JSON para comparar ejecuciones.
+#
+#   python benchmarks/run.py                                   # in-process (ASGI)
+#   python benchmarks/run.py --server uvicorn --async          # uvicorn local, modo async
+#   python benchmarks/run.py --only clients --requests 2000
+#   python benchmarks/run.py --compare benchmarks/results/base.json --threshold 15
+#
+# Con --compare sale con código 1 si algún endpoint empeora más de --threshold %
+# en req/s o en p95 (apto para CI).
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from common import ROOT, BENCH_EMAIL, BENCH_PASSWORD, temp_database, seed, import_app, asgi_client, login, drive, summarize, start_server, stop_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(HERE, "results")
+
+
+def scenarios(args):
+    # nombre -> (método, path o función que genera el path, kwargs, fracción de --requests)
+    client_id = lambda: random.randint(1, args.clients)
+    product_id = lambda: random.randint(1, args.products)
+    user_id = lambda: random.randint(1, args.users)
+    categoria = lambda: f"cat{random.randint(0, 19)}"
+    new_client = iter(range(10 ** 9))
+    return {
+        "POST /login": ("POST", "/login", {"json": {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}}, 0.05),
+        "GET /clients": ("GET", "/clients?limit=50", {}, 1),
+        "GET /clients?skip": ("GET", lambda: f"/clients?limit=50&skip={random.randint(0, args.clients - 50)}", {}, 1),
+        "GET /clients/{id}": ("GET", lambda: f"/clients/{client_id()}", {}, 1),
+        "POST /clients": ("POST", "/clients", {"json": lambda: {
+            "nombre": "Nuevo", "email": f"nuevo{next(new_client)}@example.com", "telefono": "555-0101", "empresa": "Bench"}}, 0.25),
+        "GET /products": ("GET", "/products?limit=50", {}, 1),
+        "GET /products/{id}": ("GET", lambda: f"/products/{product_id()}", {}, 1),
+        "GET /products/search": ("GET", lambda: f"/products/search?categoria={categoria()}&precio_max=500&sort=precio", {}, 1),
+        "GET /products/facets": ("GET", lambda: f"/products/facets?categoria={categoria()}", {}, 0.25),
+        "GET /users/{id}": ("GET", lambda: f"/users/{user_id()}", {}, 1),
+        "GET /users?ids&include=tasks": ("GET", lambda: "/users?include=tasks&ids=" + ",".join(
+            str(user_id()) for _ in range(20)), {}, 1),
+        "GET /users/{id}/tasks": ("GET", lambda: f"/users/{user_id()}/tasks", {}, 1),
+    }
+
+
+async def run_scenarios(client, args):
+    headers = await login(client)
+    results = {}
+    for name, (method, path, kwargs, share) in scenarios(args).items():
+        if args.only and not any(word in name for word in args.only):
+            continue
+        total = max(args.concurrency, int(args.requests * share))
+        await drive(client, "GET", "/clients?limit=1", min(50, total), args.concurrency, headers=headers)  # warm-up
+        request_headers = None if path == "/login" else headers
+        result = await drive(client, method, path, total, args.concurrency, headers=request_headers, **kwargs)
+        results[name] = summarize(result)
+        print_row(name, results[name])
+    return results
+
+
+def print_row(name, row, reference=None):
+    line = (f"{name:30} {row['rps']:9.1f} {row['p50_ms']:9.2f} {row['p95_ms']:9.2f} {row['p99_ms']:9.2f} "
+            f"{row['errors']:7d}")
+    if reference:
+        line += f"   req/s {_delta(row['rps'], reference['rps']):+6.1f}%  p95 {_delta(row['p95_ms'], reference['p95_ms']):+6.1f}%"
+    print(line)
+
+
+def _delta(value, reference):
+    return (value - reference) / reference * 100 if reference else 0.0
+
+
+def compare(current, baseline, threshold):
+    # Regresión: menos req/s o p95 más alto que la referencia en más de `threshold` %
+    print(f"\ncomparación con {baseline['meta'].get('timestamp')} ({baseline['meta'].get('commit')})")
+    for key in ("server", "async", "workers", "concurrency", "cpus", "volumes"):
+        if current["meta"].get(key) != baseline["meta"].get(key):
+            print(f"aviso: {key} distinto ({baseline['meta'].get(key)} -> {current['meta'].get(key)}), la comparación no es directa")
+    regressions = []
+    for name, row in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        print_row(name, row, reference)
+        if _delta(row["rps"], reference["rps"]) < -threshold or _delta(row["p95_ms"], reference["p95_ms"]) > threshold:
+            regressions.append(name)
+    if regressions:
+        print(f"\nregresiones (> {threshold}%): " + ", ".join(regressions))
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+async def run_in_process(url, args):
+    asgi_app = import_app(url)
+    # httpx no ejecuta el lifespan: crear el índice de texto completo a mano
+    from lifecycle import init_db
+    init_db()
+    async with asgi_client(asgi_app) as client:
+        return await run_scenarios(client, args)
+
+
+async def run_against_server(port, args):
+    import httpx
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        return await run_scenarios(client, args)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000, help="peticiones por endpoint (las altas y /login usan una fracción)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--clients", type=int, default=20000)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--tasks-per-user", type=int, default=5)
+    parser.add_argument("--server", choices=["asgi", "uvicorn", "gunicorn"], default="asgi")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--async", dest="use_async", action="store_true", help="DB_ASYNC (aiosqlite)")
+    parser.add_argument("--only", nargs="*", help="sólo endpoints cuyo nombre contenga alguna de estas palabras")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="fichero JSON de resultados (por defecto benchmarks/results/<fecha>.json)")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    url = temp_database(copy_from=None)
+    seed(url, clients=args.clients, products=args.products, users=args.users, tasks=args.tasks,
+         tasks_per_user=args.tasks_per_user)
+    if args.use_async:
+        url = url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+    print(f"{'endpoint':30} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>7}")
+    if args.server == "asgi":
+        results = asyncio.run(run_in_process(url, args))
+    else:
+        cmd = {
+            "uvicorn": [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.port), "--no-access-log",
+                        "--timeout-keep-alive", "75"],
+            "gunicorn": [sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py", "--workers", str(args.workers),
+                         "--bind", f"127.0.0.1:{args.port}", "--keep-alive", "75"],
+        }[args.server]
+        process = start_server(cmd, url, args.port)
+        try:
+            results = asyncio.run(run_against_server(args.port, args))
+        finally:
+            stop_server(process)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "server": args.server,
+            "async": args.use_async,
+            "workers": args.workers if args.server == "gunicorn" else 1,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "volumes": {"clients": args.clients, "products": args.products, "users": args.users,
+                        "tasks": args.tasks, "tasks_per_user": args.tasks_per_user},
+        },
+        "results": results,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresultados en {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
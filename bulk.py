@@ -0,0 +1,61 @@
+# Utilidades para los endpoints de carga masiva (/clients/bulk, /products/bulk)
+import os
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import insert, update
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+BULK_IN_CHUNK = int(os.getenv("BULK_IN_CHUNK", "5000"))  # parámetros por consulta IN
+
+BulkMode = Literal["insert", "upsert"]
+
+
+class BulkRowResult(BaseModel):
+    index: int
+    status: Literal["created", "updated", "duplicate", "error"]
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BulkResponse(BaseModel):
+    created: int
+    updated: int
+    skipped: int
+    results: List[BulkRowResult]
+
+
+def chunked(values, size: int = BULK_IN_CHUNK):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def insert_many(session, model, rows: List[dict]) -> List[int]:
+    # INSERT multi-fila en la transacción de la sesión; devuelve los ids en el orden de `rows`
+    if not rows:
+        return []
+    table = model.__table__
+    if session.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        result = session.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows)
+        return [row[0] for row in result]
+    # Sin RETURNING (MySQL/MariaDB antiguos): el ORM agrupa los INSERT igualmente
+    objects = [model(**row) for row in rows]
+    session.add_all(objects)
+    session.flush()
+    return [obj.id for obj in objects]
+
+
+def update_many(session, model, rows: List[dict]):
+    # UPDATE por clave primaria en lote (executemany); cada fila debe incluir "id"
+    if rows:
+        session.execute(update(model), rows)
+
+
+def build_response(results: List[BulkRowResult]) -> BulkResponse:
+    results.sort(key=lambda r: r.index)
+    return BulkResponse(
+        created=sum(1 for r in results if r.status == "created"),
+        updated=sum(1 for r in results if r.status == "updated"),
+        skipped=sum(1 for r in results if r.status in ("duplicate", "error")),
+        results=results,
+    )
@@ -0,0 +1,303 @@
+# Cache read-through para GET /clients/{id} y GET /products/{id}.
+#
+# Se guarda el JSON ya serializado junto con su ETag: un acierto devuelve los
+# bytes tal cual y un If-None-Match coincidente responde 304 sin cuerpo.
+# Las escrituras (update, delete, activar/desactivar, bulk) invalidan la entrada.
+# El JSON sale del modelo (campos en el orden declarado), no del __dict__ del
+# registro cargado: los mismos datos dan siempre el mismo ETag, sync o async.
+#
+# Un fallo sólo guarda lo leído si ese id no se invalidó mientras se cargaba
+# (begin() antes de leer, como en product_facets): si no, una lectura lenta
+# dejaría en cache la fila anterior a la escritura hasta CACHE_TTL. El control
+# es por proceso. Con Redis, las llamadas desde rutas async van al threadpool.
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+
+from clients import Client
+from products import Product
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # "memory", "redis", "fake-redis" o "none"
+CACHE_TTL = int(os.getenv("CACHE_TTL", "60"))
+CACHE_MAXSIZE = int(os.getenv("CACHE_MAXSIZE", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class MemoryLRUBackend:
+    blocking = False
+
+    def __init__(self, maxsize: int = CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: int):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisBackend:
+    # Compartido entre workers. Acepta cualquier cliente con la API de redis-py
+    # (get / set(ex=) / delete), p. ej. FakeRedis para pruebas locales.
+    blocking = True
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: int):
+        self.client.set(key, value, ex=ttl)
+
+    def delete(self, key: str):
+        self.client.delete(key)
+
+
+def _score_bound(bound):
+    # Límites al estilo Redis: número, "-inf"/"+inf" o "(x" (exclusivo)
+    if isinstance(bound, str) and bound.startswith("("):
+        return float(bound[1:]), True
+    return float(bound), False
+
+
+class FakeRedis:
+    # Sustituto en memoria de redis.Redis con el subconjunto que usan RedisBackend,
+    # la lista de revocación y el rate limiter (get / set / delete, conjuntos
+    # ordenados, contadores con incr / expire y pipeline)
+    def __init__(self):
+        self._backend = MemoryLRUBackend(maxsize=1 << 30)
+        self._zsets = {}
+        self._counters = {}  # key -> [valor, expires_at o None]
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is not None and (counter[1] is None or counter[1] > time.time()):
+                return str(counter[0]).encode()
+        return self._backend.get(key)
+
+    def set(self, key, value, ex=None):
+        self._backend.set(key, value, ex if ex is not None else 1 << 31)
+
+    def delete(self, *keys):
+        for key in keys:
+            self._backend.delete(key)
+            with self._lock:
+                self._zsets.pop(key, None)
+                self._counters.pop(key, None)
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or (counter[1] is not None and counter[1] <= time.time()):
+                counter = self._counters[key] = [0, None]
+            counter[0] += amount
+            return counter[0]
+
+    def expire(self, key, seconds):
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                return False
+            counter[1] = time.time() + seconds
+            return True
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+    def zadd(self, name, mapping, nx=False):
+        with self._lock:
+            zset = self._zsets.setdefault(name, {})
+            added = sum(1 for member in mapping if member not in zset)
+            zset.update({member: float(score) for member, score in mapping.items() if not (nx and member in zset)})
+            return added
+
+    def _in_range(self, score, low, high):
+        (low, low_open), (high, high_open) = _score_bound(low), _score_bound(high)
+        return (score > low if low_open else score >= low) and (score < high if high_open else score <= high)
+
+    def zrangebyscore(self, name, min, max):
+        with self._lock:
+            items = sorted(self._zsets.get(name, {}).items(), key=lambda item: item[1])
+        return [member.encode() if isinstance(member, str) else member
+                for member, score in items if self._in_range(score, min, max)]
+
+    def zremrangebyscore(self, name, min, max):
+        with self._lock:
+            zset = self._zsets.get(name, {})
+            stale = [member for member, score in zset.items() if self._in_range(score, min, max)]
+            for member in stale:
+                del zset[member]
+            return len(stale)
+
+
+class _FakePipeline:
+    # Encola las llamadas y las ejecuta en orden con execute(), como redis.client.Pipeline
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._calls.append((method, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        return [method(*args, **kwargs) for method, args, kwargs in calls]
+
+
+class NullBackend:
+    blocking = False
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+
+def make_backend(name: str = CACHE_BACKEND):
+    if name == "redis":
+        import redis  # dependencia opcional: sólo con CACHE_BACKEND=redis
+        return RedisBackend(redis.Redis.from_url(REDIS_URL))
+    if name == "fake-redis":
+        return RedisBackend(FakeRedis())
+    if name == "none":
+        return NullBackend()
+    return MemoryLRUBackend()
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+class RecordCache:
+    def __init__(self, namespace: str, model, backend, ttl: int = CACHE_TTL):
+        self.namespace = namespace
+        self.model = model
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._invalidated = OrderedDict()  # clave -> generación de su última invalidación (las más recientes)
+        self._invalidated_floor = 0  # generación más alta ya olvidada de _invalidated
+        self._lock = threading.Lock()
+
+    def _key(self, record_id) -> str:
+        return f"{self.namespace}:{record_id}"
+
+    def get(self, record_id) -> Optional[Tuple[str, bytes]]:
+        body = self.backend.get(self._key(record_id))
+        if body is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return etag_for(body), body
+
+    def begin(self) -> int:
+        # Antes de leer el registro de la base; el valor se pasa a set()
+        with self._lock:
+            return self.generation
+
+    def set(self, record_id, record, since: Optional[int] = None) -> Tuple[str, bytes]:
+        body = self.model.model_validate(record).model_dump_json().encode()
+        key = self._key(record_id)
+        with self._lock:
+            # Bajo el lock: una invalidación posterior borra después de este set
+            stale = since is not None and (since < self._invalidated_floor or self._invalidated.get(key, 0) > since)
+            if not stale:
+                self.backend.set(key, body, self.ttl)
+        return etag_for(body), body
+
+    def invalidate(self, *record_ids):
+        keys = [self._key(record_id) for record_id in record_ids]
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                self._invalidated[key] = self.generation
+                self._invalidated.move_to_end(key)
+            while len(self._invalidated) > CACHE_MAXSIZE:
+                _, self._invalidated_floor = self._invalidated.popitem(last=False)
+        for key in keys:
+            self.backend.delete(key)
+
+    async def _run(self, fn, *args):
+        if self.backend.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    async def invalidate_async(self, *record_ids):
+        await self._run(self.invalidate, *record_ids)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_ratio": self.hits / total if total else 0.0}
+
+    def response(self, request: Request, record_id, loader: Callable) -> Response:
+        # loader() sólo se llama en un fallo; debe devolver el registro o lanzar 404
+        cached = self.get(record_id)
+        if cached is None:
+            since = self.begin()
+            cached = self.set(record_id, loader(), since)
+        return _conditional_response(request, *cached)
+
+    async def response_async(self, request: Request, record_id, loader: Callable) -> Response:
+        cached = await self._run(self.get, record_id)
+        if cached is None:
+            since = self.begin()
+            cached = await self._run(self.set, record_id, await loader(), since)
+        return _conditional_response(request, *cached)
+
+
+def _conditional_response(request: Request, etag: str, body: bytes) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+_backend = make_backend()
+client_cache = RecordCache("client", Client, _backend)
+product_cache = RecordCache("product", Product, _backend)
@@ -1,7 +1,17 @@
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 
 class Client(SQLModel, table=True):
+    # Índices para la paginación por cursor (ver pagination.py)
+    __table_args__ = (
+        Index("ix_client_activo_id", "activo", "id"),
+        Index("ix_client_fecha_actualizacion_id", "fecha_actualizacion", "id"),
+        Index("ix_client_activo_fecha_actualizacion_id", "activo", "fecha_actualizacion", "id"),
+        # Email único: el alta y la edición detectan duplicados con la restricción (ver migrations.py)
+        Index("ix_client_email", "email", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     nombre: str
     email: str
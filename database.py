@@ -1,11 +1,207 @@
-from sqlmodel import create_engine, Session
-import os
-
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./db.db")  # fallback local
-# DATABASE_URL = "mysql+pymysql://user:password@db:3306/mydb"  # fallback local
-
-engine = create_engine(DATABASE_URL, echo=True)
-
-def get_session():
-    with Session(engine) as session:
-        yield session
+from sqlmodel import create_engine, Session
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./db.db")  # fallback local
+# DATABASE_URL = "mysql+pymysql://user:password@db:3306/mydb"  # fallback local
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+# Configuración del motor (todas las opciones se pueden sobreescribir por entorno)
+DB_ECHO = _env_bool("DB_ECHO", False)  # loguear cada SQL: sólo para depurar
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # < wait_timeout de MariaDB; -1 desactiva
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)  # evita conexiones muertas tras periodos inactivos
+SQLITE_WAL = _env_bool("SQLITE_WAL", True)
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Drivers async -> su equivalente sync (y viceversa) para que ambos motores
+# apunten a la misma base
+ASYNC_DRIVERS = {
+    "sqlite+aiosqlite": "sqlite",
+    "mysql+aiomysql": "mysql+pymysql",
+}
+
+
+def _to_sync_url(url: str) -> str:
+    for async_driver, sync_driver in ASYNC_DRIVERS.items():
+        if url.startswith(async_driver + "://"):
+            return sync_driver + url[len(async_driver):]
+    return url
+
+
+def _to_async_url(url: str) -> str:
+    for async_driver, sync_driver in ASYNC_DRIVERS.items():
+        if url.startswith(sync_driver + "://"):
+            return async_driver + url[len(sync_driver):]
+    return url
+
+
+# Modo async: DB_ASYNC=1 o un DATABASE_URL con driver async (sqlite+aiosqlite://, mysql+aiomysql://)
+DB_ASYNC = os.getenv("DB_ASYNC", "").lower() in ("1", "true", "yes") or _to_sync_url(DATABASE_URL) != DATABASE_URL
+
+
+class PoolStats:
+    # Contadores del pool para ajustar pool_size / max_overflow
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def incr(self, counter: str):
+        # Los eventos del pool llegan desde muchos hilos a la vez
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_time_total += seconds
+            if seconds > self.wait_time_max:
+                self.wait_time_max = seconds
+            if timed_out:
+                self.timeouts += 1
+
+
+class _InstrumentedPoolMixin:
+    # Mide cuánto tarda cada checkout en obtener una conexión (espera por una
+    # libre, más la conexión nueva o el pre-ping si los hay)
+    stats: PoolStats = None
+
+    def connect(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self.stats.record_wait(time.perf_counter() - t0, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - t0)
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    stats = PoolStats()
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    stats = PoolStats()
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":"))
+
+
+def _engine_kwargs(url: str, poolclass) -> dict:
+    kwargs = {"echo": DB_ECHO}
+    if _is_memory_sqlite(url):
+        # SQLite en memoria necesita su pool por defecto (una sola conexión)
+        return kwargs
+    kwargs.update(
+        poolclass=poolclass,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    if url.startswith("sqlite"):
+        kwargs["connect_args"] = {"check_same_thread": False}
+    return kwargs
+
+
+def _instrument(sync_engine, stats: PoolStats):
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.incr("checkouts")
+
+    @event.listens_for(sync_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats.incr("invalidations")
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats.incr("connects")
+        if sync_engine.dialect.name == "sqlite":
+            cursor = dbapi_connection.cursor()
+            if SQLITE_WAL:
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            cursor.close()
+
+
+SYNC_DATABASE_URL = _to_sync_url(DATABASE_URL)
+engine = create_engine(SYNC_DATABASE_URL, **_engine_kwargs(SYNC_DATABASE_URL, InstrumentedQueuePool))
+_instrument(engine, InstrumentedQueuePool.stats)
+
+async_engine = None
+if DB_ASYNC:
+    # Import diferido: sqlalchemy.ext.asyncio requiere greenlet, sólo necesario en modo async
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from sqlalchemy.ext.asyncio import create_async_engine
+    ASYNC_DATABASE_URL = _to_async_url(DATABASE_URL)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_kwargs(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool))
+    _instrument(async_engine.sync_engine, InstrumentedAsyncQueuePool.stats)
+
+
+def pool_status(sync_engine) -> dict:
+    pool = sync_engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats = pool.stats
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            checkouts=stats.checkouts,
+            connects=stats.connects,
+            invalidations=stats.invalidations,
+            timeouts=stats.timeouts,
+            wait_time_total=stats.wait_time_total,
+            wait_time_max=stats.wait_time_max,
+        )
+    return status
+
+
+@contextmanager
+def count_queries(bind=None):
+    # Cuenta las sentencias SQL ejecutadas dentro del bloque (detección de N+1)
+    target = bind if bind is not None else engine
+    counter = {"count": 0}
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["count"] += 1
+
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(target, "before_cursor_execute", _before_cursor_execute)
+
+
+def get_session():
+    with Session(engine) as session:
+        yield session
+
+async def get_async_session():
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
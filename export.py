@@ -0,0 +1,64 @@
+# Exportación masiva en streaming (NDJSON / CSV) con cursor del lado del servidor.
+# La memoria se mantiene constante: se leen y envían bloques de EXPORT_BATCH_SIZE filas.
+import csv
+import io
+import json
+import os
+from typing import Literal, Optional
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlmodel import Session
+
+from database import engine
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _iter_partitions(model, activo: Optional[bool]):
+    # Sesión propia: el generador vive más que la dependencia get_session
+    columns = list(model.__table__.columns)
+    statement = select(*columns).order_by(model.id)
+    if activo is not None:
+        statement = statement.where(model.activo == activo)
+    with Session(engine) as session:
+        result = session.execute(statement.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+        for partition in result.partitions():
+            yield partition
+
+
+def _ndjson(model, activo: Optional[bool]):
+    keys = [column.name for column in model.__table__.columns]
+    dumps = json.dumps
+    for partition in _iter_partitions(model, activo):
+        yield "".join(dumps(dict(zip(keys, row)), ensure_ascii=False) + "\n" for row in partition)
+
+
+def _csv(model, activo: Optional[bool]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in model.__table__.columns])
+    # La cabecera sale de inmediato, antes de la primera consulta
+    yield buffer.getvalue()
+    for partition in _iter_partitions(model, activo):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(partition)
+        yield buffer.getvalue()
+
+
+def export_response(model, format: ExportFormat = "ndjson", activo: Optional[bool] = None) -> StreamingResponse:
+    rows = _csv(model, activo) if format == "csv" else _ndjson(model, activo)
+    filename = f"{model.__tablename__}.{format}"
+    return StreamingResponse(
+        rows,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,43 @@
+# Respuestas JSON rápidas para los listados (GET /clients, /products y /activos).
+#
+# Los listados seleccionan columnas (filas planas, sin instancias ORM) y se
+# serializan directamente con orjson: sin validar cada fila con pydantic ni
+# pasar por jsonable_encoder. El response_model de la ruta se mantiene para la
+# documentación OpenAPI; al devolver un Response, FastAPI no lo re-valida.
+import json
+
+from fastapi import Response
+
+from pagination import set_next_cursor
+
+try:
+    import orjson  # dependencia opcional: sin ella se usa json de la stdlib
+except ImportError:
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def columns(model):
+    # Todas las columnas de la tabla, en el orden de los campos del modelo
+    return list(model.__table__.columns)
+
+
+def rows_response(result, order_by: str, limit: int) -> FastJSONResponse:
+    # result: resultado de un select(*columns(...)) paginado con paginate()
+    keys = list(result.keys())
+    rows = result.all()
+    response = FastJSONResponse([dict(zip(keys, row)) for row in rows])
+    set_next_cursor(response, rows, order_by, limit)
+    return response
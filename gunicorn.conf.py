@@ -0,0 +1,70 @@
+# Servidor de producción: gunicorn como supervisor y N workers uvicorn.
+#
+#   gunicorn app:app -c gunicorn.conf.py
+#
+# Para desarrollo sigue valiendo `uvicorn app:app --reload`.
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Sin preload: cada worker importa la app y abre su propio pool de conexiones
+preload_app = False
+
+# SIGTERM: se deja de aceptar conexiones y se esperan las peticiones en vuelo
+# hasta graceful_timeout antes de matar al worker
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+# Reciclado opcional de workers (0 = desactivado); el jitter evita reinicios simultáneos
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "100"))
+
+# Heartbeat de los workers en memoria: /tmp puede ser una capa lenta en Docker
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+accesslog = os.getenv("ACCESS_LOG") or None
+
+# IPs del proxy/balanceador cuyas cabeceras X-Forwarded-For/-Proto se aceptan: el
+# límite de /login es por IP de cliente y, sin esto, todos comparten la del proxy
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def on_starting(server):
+    # Una sola vez, en el maestro y antes del fork: los workers heredan DB_SCHEMA_READY
+    if server.cfg.workers > 1:
+        # Antes de importar jobs: con la cola en memoria, GET /jobs/{id} sólo lo
+        # respondería el worker que aceptó el trabajo
+        os.environ.setdefault("JOBS_BACKEND", "sqlite")
+    from lifecycle import init_db
+    from database import engine
+
+    init_db()
+    engine.dispose()
+    _warn_per_worker_state(server)
+
+
+def _warn_per_worker_state(server):
+    # Estado que cada worker guarda en memoria y que con varios workers debe ser compartido
+    from revocation import REVOCATION_BACKEND
+    from cache import CACHE_BACKEND
+    from ratelimit import RATE_LIMIT_BACKEND
+
+    if server.cfg.workers <= 1:
+        return
+    if REVOCATION_BACKEND == "memory":
+        server.log.warning(
+            "REVOCATION_BACKEND=memory con %d workers: un token revocado (logout, rotación) sigue siendo "
+            "válido en los demás workers hasta que expira. Usar REVOCATION_BACKEND=redis.", server.cfg.workers)
+    if CACHE_BACKEND == "memory":
+        server.log.warning(
+            "CACHE_BACKEND=memory con %d workers: tras una edición, los demás workers sirven el registro "
+            "anterior (y su ETag) hasta CACHE_TTL. Usar CACHE_BACKEND=redis.", server.cfg.workers)
+    if RATE_LIMIT_BACKEND == "memory":
+        server.log.warning(
+            "RATE_LIMIT_BACKEND=memory con %d workers: cada worker aplica sus propios límites, así que "
+            "un cliente dispone de hasta %d veces el ritmo configurado (también en /login). "
+            "Usar RATE_LIMIT_BACKEND=redis.", server.cfg.workers, server.cfg.workers)
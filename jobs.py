@@ -0,0 +1,550 @@
+# Cola de trabajos en segundo plano con escritura diferida (write-behind).
+#
+# Activar/desactivar clientes y productos y asignar tareas no escriben en la
+# petición: se encolan como un trabajo y la respuesta es 202 con su id
+# (GET /jobs/{id} devuelve el estado). Cada hilo del pool toma de la cola los
+# trabajos pendientes (hasta JOBS_BATCH_MAX operaciones, esperando
+# JOBS_BATCH_WAIT a que llegue el resto de la ráfaga) y los aplica en una sola
+# transacción: un UPDATE ... WHERE id IN por estado y un INSERT multi-fila de
+# asignaciones, en lugar de una transacción por fila.
+#
+# La cola está acotada en operaciones pendientes (JOBS_QUEUE_MAX_ITEMS): con
+# la cola llena el alta del trabajo responde 503 con Retry-After.
+#
+# - JOBS_BACKEND=memory (defecto): cola y estados en la memoria del worker. Un
+#   GET /jobs/{id} sólo lo responde el worker que aceptó el trabajo, y lo que
+#   quede en cola al matar el proceso (sin parada ordenada) se pierde.
+# - JOBS_BACKEND=sqlite: broker local en un fichero SQLite (JOBS_BROKER_PATH)
+#   compartido por los workers de la máquina: cualquiera responde el estado y
+#   los trabajos sobreviven a un reinicio. Las operaciones son idempotentes,
+#   así que reintentar un trabajo interrumpido es seguro. Un trabajo en curso
+#   tiene un lease de JOBS_LEASE_SECONDS que su worker renueva mientras lo
+#   ejecuta; sólo se reencola si el lease vence (el worker murió o se colgó).
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import insert, select, tuple_, update
+from sqlmodel import Session
+
+from database import engine
+from models import User, Task, UserTaskLink
+from clients import Client
+from products import Product
+from bulk import chunked, BULK_IN_CHUNK, BULK_MAX_ITEMS
+from cache import client_cache, product_cache
+from product_facets import facet_values, product_facets
+from logging_config import get_logger
+
+JOBS_BACKEND = os.getenv("JOBS_BACKEND", "memory")  # "memory" o "sqlite"
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "1"))  # con SQLite hay un solo escritor: más hilos sólo compiten
+JOBS_QUEUE_MAX_ITEMS = int(os.getenv("JOBS_QUEUE_MAX_ITEMS", "20000"))
+JOBS_BATCH_MAX = int(os.getenv("JOBS_BATCH_MAX", "5000"))  # operaciones por transacción
+JOBS_BATCH_WAIT = float(os.getenv("JOBS_BATCH_WAIT", "0.01"))
+JOBS_RETENTION = int(os.getenv("JOBS_RETENTION", "3600"))  # segundos que se conserva el estado de un trabajo terminado
+JOBS_DRAIN_TIMEOUT = float(os.getenv("JOBS_DRAIN_TIMEOUT", "10"))  # < GRACEFUL_TIMEOUT
+JOBS_BROKER_PATH = os.getenv("JOBS_BROKER_PATH", os.path.join(os.getenv("TMPDIR", "/tmp"), "app-jobs.db"))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "0.05"))
+JOBS_LEASE_SECONDS = int(os.getenv("JOBS_LEASE_SECONDS", "60"))  # "running" sin renovar en este tiempo: se reencola
+JOBS_SWEEP_SECONDS = 60
+
+logger = get_logger("jobs")
+
+
+class IdList(BaseModel):
+    ids: List[int]
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
+    items: int
+    message: Optional[str] = None
+
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str
+    status: str
+    items: int
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+
+def public_view(job: dict) -> dict:
+    # Estado para GET /jobs/{id}: sin la carga
+    return {
+        "id": job["id"], "kind": job["kind"], "status": job["status"], "items": job["items"],
+        "created_at": _iso(job["created_at"]), "started_at": _iso(job.get("started_at")),
+        "finished_at": _iso(job.get("finished_at")), "result": job.get("result"), "error": job.get("error"),
+    }
+
+
+class MemoryJobBroker:
+    def __init__(self, max_items: int = JOBS_QUEUE_MAX_ITEMS, retention: int = JOBS_RETENTION):
+        self.max_items = max_items
+        self.retention = retention
+        self._pending = deque()
+        self._pending_items = 0
+        self._running = 0
+        self._jobs = {}  # id -> trabajo (en cola, en curso o terminado)
+        self._next_sweep = time.monotonic() + JOBS_SWEEP_SECONDS
+        self._cond = threading.Condition()
+
+    def put(self, job: dict) -> bool:
+        with self._cond:
+            if self._pending_items + job["items"] > self.max_items:
+                return False
+            if time.monotonic() >= self._next_sweep:
+                self._sweep()
+            self._jobs[job["id"]] = job
+            self._pending.append(job)
+            self._pending_items += job["items"]
+            self._cond.notify()
+            return True
+
+    def take(self, max_items: int, wait: float, timeout: float) -> list:
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout)
+                if not self._pending:
+                    return []
+            # Espera corta a que llegue el resto de la ráfaga
+            deadline = time.monotonic() + wait
+            while self._pending_items < max_items:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, items, now = [], 0, time.time()
+            while self._pending and (not batch or items + self._pending[0]["items"] <= max_items):
+                job = self._pending.popleft()
+                self._pending_items -= job["items"]
+                items += job["items"]
+                job["status"], job["started_at"] = "running", now
+                batch.append(job)
+            self._running += len(batch)
+            return batch
+
+    def renew(self, job_ids: list):
+        pass  # en memoria no hay reencolado: un trabajo en curso muere con su worker
+
+    def finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+        with self._cond:
+            job = self._jobs[job_id]
+            job.update(status=status, result=result, error=error, finished_at=time.time(), payload=None)
+            self._running -= 1
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return public_view(job) if job else None
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def _sweep(self):
+        # Descarta el estado de los trabajos terminados hace más de `retention` segundos
+        self._next_sweep = time.monotonic() + JOBS_SWEEP_SECONDS
+        limit = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.get("finished_at") and job["finished_at"] < limit]:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"queued_jobs": len(self._pending), "queued_items": self._pending_items, "running_jobs": self._running}
+
+
+class SQLiteJobBroker:
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS job ("
+        "id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT, items INTEGER NOT NULL, status TEXT NOT NULL, "
+        "created_at REAL NOT NULL, started_at REAL, finished_at REAL, result TEXT, error TEXT, lease_until REAL)",
+        "CREATE INDEX IF NOT EXISTS ix_job_status_created_at ON job (status, created_at)",
+    )
+    COLUMNS = ("id", "kind", "payload", "items", "status", "created_at", "started_at", "finished_at", "result", "error")
+
+    def __init__(self, path: str = JOBS_BROKER_PATH, max_items: int = JOBS_QUEUE_MAX_ITEMS,
+                 retention: int = JOBS_RETENTION, poll_interval: float = JOBS_POLL_INTERVAL,
+                 lease: float = JOBS_LEASE_SECONDS):
+        self.path = path
+        self.max_items = max_items
+        self.retention = retention
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._notify = threading.Event()  # aviso a los hilos del mismo proceso; entre procesos, sondeo
+        self._next_sweep = 0.0
+
+    def _conn(self) -> sqlite3.Connection:
+        # Una conexión por hilo y por proceso (nunca heredada a través del fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            if "lease_until" not in {row[1] for row in conn.execute("PRAGMA table_info(job)")}:
+                try:
+                    conn.execute("ALTER TABLE job ADD COLUMN lease_until REAL")  # broker de una versión anterior
+                except sqlite3.OperationalError:
+                    pass  # otro proceso la añadió a la vez
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def put(self, job: dict) -> bool:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            queued = conn.execute("SELECT COALESCE(SUM(items), 0) FROM job WHERE status = 'queued'").fetchone()[0]
+            if queued + job["items"] > self.max_items:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute("INSERT INTO job (id, kind, payload, items, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+                         (job["id"], job["kind"], json.dumps(job["payload"]), job["items"], job["created_at"]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._notify.set()
+        return True
+
+    def take(self, max_items: int, wait: float, timeout: float) -> list:
+        deadline = time.monotonic() + timeout
+        conn = self._conn()
+        while not conn.execute("SELECT 1 FROM job WHERE status = 'queued' LIMIT 1").fetchone():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            self._notify.wait(min(remaining, self.poll_interval))
+            self._notify.clear()
+        time.sleep(wait)  # resto de la ráfaga
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            batch, items = [], 0
+            for row in conn.execute("SELECT id, kind, payload, items FROM job WHERE status = 'queued' ORDER BY created_at LIMIT 1000"):
+                if batch and items + row[3] > max_items:
+                    break
+                batch.append({"id": row[0], "kind": row[1], "payload": json.loads(row[2]), "items": row[3]})
+                items += row[3]
+            for chunk in chunked([job["id"] for job in batch]):
+                conn.execute(f"UPDATE job SET status = 'running', started_at = ?, lease_until = ? WHERE id IN ({','.join('?' * len(chunk))})",
+                             (now, now + self.lease, *chunk))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return batch
+
+    def renew(self, job_ids: list):
+        # Latido del worker que ejecuta los trabajos: mientras lo renueve, sweep() no los reencola
+        conn = self._conn()
+        lease_until = time.time() + self.lease
+        for chunk in chunked(job_ids):
+            conn.execute(f"UPDATE job SET lease_until = ? WHERE status = 'running' AND id IN ({','.join('?' * len(chunk))})",
+                         (lease_until, *chunk))
+
+    def finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+        now = time.time()
+        conn = self._conn()
+        conn.execute("UPDATE job SET status = ?, result = ?, error = ?, finished_at = ?, payload = NULL WHERE id = ?",
+                     (status, json.dumps(result) if result is not None else None, error, now, job_id))
+        if now >= self._next_sweep:
+            self.sweep(now)
+
+    def sweep(self, now: Optional[float] = None):
+        # Reencola los trabajos con el lease vencido (worker muerto) y descarta los terminados antiguos
+        now = time.time() if now is None else now
+        self._next_sweep = now + JOBS_SWEEP_SECONDS
+        conn = self._conn()
+        conn.execute("UPDATE job SET status = 'queued', started_at = NULL, lease_until = NULL "
+                     "WHERE status = 'running' AND COALESCE(lease_until, started_at + ?) < ?", (self.lease, now))
+        conn.execute("DELETE FROM job WHERE finished_at < ?", (now - self.retention,))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._conn().execute(f"SELECT {', '.join(self.COLUMNS)} FROM job WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(self.COLUMNS, row))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return public_view(job)
+
+    def wake(self):
+        self._notify.set()
+
+    def stats(self) -> dict:
+        counts = dict(((status, (jobs, items)) for status, jobs, items in self._conn().execute(
+            "SELECT status, COUNT(*), SUM(items) FROM job WHERE status IN ('queued', 'running') GROUP BY status")))
+        queued_jobs, queued_items = counts.get("queued", (0, 0))
+        return {"queued_jobs": queued_jobs, "queued_items": queued_items, "running_jobs": counts.get("running", (0, 0))[0]}
+
+
+def make_broker(name: str = JOBS_BACKEND):
+    if name == "sqlite":
+        return SQLiteJobBroker()
+    return MemoryJobBroker()
+
+
+# ---------------------------------------------------------------- operaciones
+
+ACTIVO_MODELS = {"client_activo": (Client, client_cache), "product_activo": (Product, product_cache)}
+PRODUCT_FACET_COLUMNS = (Product.id, Product.categoria, Product.subcategoria, Product.marca, Product.precio, Product.activo)
+
+
+def _apply_activo(session: Session, kind: str, jobs: list, now: str, results: dict, after_commit: list):
+    model, cache = ACTIVO_MODELS[kind]
+    final = {}  # id -> activo: en la misma ráfaga gana la última operación
+    for job in jobs:
+        for record_id in job["payload"]["ids"]:
+            final[record_id] = job["payload"]["activo"]
+    columns = PRODUCT_FACET_COLUMNS if model is Product else (model.id,)
+    existing = {}  # id -> fila antes del cambio
+    for chunk in chunked(list(final)):
+        existing.update((row.id, row._asdict()) for row in session.execute(select(*columns).where(model.id.in_(chunk))))
+    for activo in (True, False):
+        ids = [record_id for record_id, value in final.items() if value is activo and record_id in existing]
+        for chunk in chunked(ids):
+            session.execute(update(model).where(model.id.in_(chunk)).values(activo=activo, fecha_actualizacion=now))
+    for job in jobs:
+        ids = job["payload"]["ids"]
+        results[job["id"]] = {"updated": sum(1 for record_id in ids if record_id in existing),
+                              "not_found": [record_id for record_id in ids if record_id not in existing]}
+
+    facets_since = product_facets.begin() if model is Product else None  # antes del commit del lote
+
+    def invalidate():
+        cache.invalidate(*existing)
+        if model is Product:
+            for record_id, row in existing.items():
+                if bool(row["activo"]) != final[record_id]:
+                    product_facets.apply(facets_since, facet_values(row), facet_values(dict(row, activo=final[record_id])))
+    after_commit.append(invalidate)
+
+
+def _apply_assign(session: Session, jobs: list, results: dict):
+    pairs = list(dict.fromkeys(tuple(pair) for job in jobs for pair in job["payload"]["pairs"]))
+    users, tasks, linked = set(), set(), set()
+    for chunk in chunked(list({user_id for user_id, _ in pairs})):
+        users.update(session.execute(select(User.id).where(User.id.in_(chunk))).scalars())
+    for chunk in chunked(list({task_id for _, task_id in pairs})):
+        tasks.update(session.execute(select(Task.id).where(Task.id.in_(chunk))).scalars())
+    # Dos parámetros por par en la consulta IN de tuplas
+    for chunk in chunked(pairs, BULK_IN_CHUNK // 2):
+        linked.update(tuple(row) for row in session.execute(
+            select(UserTaskLink.user_id, UserTaskLink.task_id).where(tuple_(UserTaskLink.user_id, UserTaskLink.task_id).in_(chunk))))
+    new = []
+    for job in jobs:
+        result = {"assigned": 0, "already_assigned": [], "not_found": []}
+        for pair in map(tuple, job["payload"]["pairs"]):
+            if pair[0] not in users or pair[1] not in tasks:
+                result["not_found"].append(list(pair))
+            elif pair in linked:
+                result["already_assigned"].append(list(pair))
+            else:
+                linked.add(pair)
+                new.append({"user_id": pair[0], "task_id": pair[1]})
+                result["assigned"] += 1
+        results[job["id"]] = result
+    if new:
+        session.execute(insert(UserTaskLink.__table__), new)
+
+
+def apply_batch(session: Session, jobs: list):
+    # Todas las operaciones del lote en la transacción de `session`; devuelve los
+    # resultados por trabajo y lo que hay que hacer tras el commit (caches, facetas)
+    results, after_commit = {}, []
+    now = datetime.now().isoformat()
+    for kind in ACTIVO_MODELS:
+        same_kind = [job for job in jobs if job["kind"] == kind]
+        if same_kind:
+            _apply_activo(session, kind, same_kind, now, results, after_commit)
+    assign = [job for job in jobs if job["kind"] == "assign_task"]
+    if assign:
+        _apply_assign(session, assign, results)
+    return results, after_commit
+
+
+# ---------------------------------------------------------------- cola
+
+class JobQueue:
+    def __init__(self, broker, workers: int = JOBS_WORKERS, batch_max: int = JOBS_BATCH_MAX,
+                 batch_wait: float = JOBS_BATCH_WAIT):
+        self.broker = broker
+        self.workers = workers
+        self.batch_max = batch_max
+        self.batch_wait = batch_wait
+        self.rejected = 0
+        self.batches = 0
+        self.done = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._threads = []
+        self._active = set()  # ids de los trabajos en ejecución en este proceso
+        self._active_lock = threading.Lock()
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread = None
+
+    def submit(self, kind: str, payload: dict, items: int) -> dict:
+        job = {"id": uuid.uuid4().hex, "kind": kind, "payload": payload, "items": items,
+               "status": "queued", "created_at": time.time()}
+        if not self.broker.put(job):
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Cola de trabajos llena, reintente más tarde", headers={"Retry-After": "1"})
+        return job
+
+    def set_activo(self, model, ids: list, activo: bool) -> dict:
+        ids = list(dict.fromkeys(ids))
+        kind = "client_activo" if model is Client else "product_activo"
+        return self.submit(kind, {"ids": ids, "activo": activo}, len(ids))
+
+    def assign_tasks(self, pairs: list) -> dict:
+        return self.submit("assign_task", {"pairs": [list(pair) for pair in pairs]}, len(pairs))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self.broker.get(job_id)
+
+    def _run(self):
+        # Al parar se sigue drenando hasta vaciar la cola (o agotar JOBS_DRAIN_TIMEOUT en stop)
+        while True:
+            try:
+                batch = self.broker.take(self.batch_max, self.batch_wait, timeout=0.5)
+            except Exception:
+                logger.exception("Error al leer la cola de trabajos")
+                time.sleep(1)
+                continue
+            if not batch:
+                if self._stop.is_set():
+                    return
+                continue
+            ids = [job["id"] for job in batch]
+            with self._active_lock:
+                self._active.update(ids)
+            try:
+                self._process(batch)
+            except Exception:
+                # Ningún error mata el hilo: sin él la cola acotada se llenaría y todas las altas darían 503
+                logger.exception("Error al procesar un lote de trabajos", extra={"jobs": len(batch)})
+                time.sleep(1)
+            finally:
+                with self._active_lock:
+                    self._active.difference_update(ids)
+
+    def _heartbeat(self):
+        # Renueva el lease de los trabajos en curso; con un lote largo, otro worker no lo repite
+        while not self._heartbeat_stop.wait(self.broker.lease / 4):
+            with self._active_lock:
+                ids = list(self._active)
+            if not ids:
+                continue
+            try:
+                self.broker.renew(ids)
+            except Exception:
+                logger.exception("Error al renovar el lease de los trabajos en curso", extra={"jobs": len(ids)})
+
+    def _process(self, batch: list):
+        try:
+            with Session(engine) as session:
+                results, after_commit = apply_batch(session, batch)
+                session.commit()
+        except Exception as e:
+            if len(batch) > 1:
+                # Un trabajo erróneo no hace fallar al resto del lote: se reintentan por separado
+                logger.warning("Lote fallido, reintentando trabajo a trabajo", extra={"jobs": len(batch), "error": str(e)})
+                for job in batch:
+                    self._process([job])
+                return
+            logger.exception("Trabajo fallido", extra={"job_id": batch[0]["id"], "kind": batch[0]["kind"]})
+            self.failed += 1
+            self._finish(batch[0]["id"], "failed", error=str(e))
+            return
+        self.batches += 1
+        for callback in after_commit:
+            try:
+                callback()
+            except Exception:
+                # Los datos ya están escritos: un fallo de cache (p. ej. Redis caído) no falla el trabajo
+                logger.exception("Error al invalidar caches tras un lote")
+        for job in batch:
+            self._finish(job["id"], "done", results[job["id"]])
+        self.done += len(batch)
+
+    def _finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+        # Si el broker no puede guardar el estado (SQLite bloqueado, disco), el trabajo queda
+        # "running": el broker SQLite lo reencola cuando vence su lease (operaciones idempotentes)
+        try:
+            self.broker.finish(job_id, status, result, error)
+        except Exception:
+            logger.exception("Error al guardar el estado de un trabajo", extra={"job_id": job_id, "status": status})
+
+    def start(self):
+        # Por worker (tras el fork), desde el lifespan
+        if self._threads:
+            return
+        self._stop.clear()
+        if isinstance(self.broker, SQLiteJobBroker):
+            self.broker.sweep()
+            self._heartbeat_stop.clear()
+            self._heartbeat_thread = threading.Thread(target=self._heartbeat, name="jobs-heartbeat", daemon=True)
+            self._heartbeat_thread.start()
+        self._threads = [threading.Thread(target=self._run, name=f"jobs-{n}", daemon=True) for n in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = JOBS_DRAIN_TIMEOUT):
+        self._stop.set()
+        self.broker.wake()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        if self._heartbeat_thread is not None:
+            self._heartbeat_stop.set()
+            self._heartbeat_thread.join(timeout=1)
+            self._heartbeat_thread = None
+        pending = self.broker.stats()["queued_items"]
+        if pending:
+            logger.warning("Parada con trabajos en cola", extra={"items": pending, "backend": type(self.broker).__name__})
+        self._threads = []
+
+    def stats(self) -> dict:
+        return dict(self.broker.stats(), rejected=self.rejected, batches=self.batches, done=self.done, failed=self.failed)
+
+
+job_queue = JobQueue(make_broker())
+
+
+def check_ids(ids: List[int]):
+    if not ids:
+        raise HTTPException(status_code=400, detail="La lista de ids está vacía")
+    if len(ids) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Máximo {BULK_MAX_ITEMS} ids por lote")
+
+
+def job_accepted(job: dict, response: Response, message: Optional[str] = None) -> JobAccepted:
+    # 202: la escritura se aplica en segundo plano; el estado, en Location
+    response.headers["Location"] = f"/jobs/{job['id']}"
+    return JobAccepted(job_id=job["id"], status=job["status"], items=job["items"], message=message)
+
+
+def get_job_status(job_id: str) -> JobStatus:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return JobStatus(**job)
@@ -0,0 +1,93 @@
+# Arranque y parada de la aplicación (lifespan de FastAPI y hooks de gunicorn).
+#
+# El esquema se crea una sola vez: gunicorn lo hace en el proceso maestro antes
+# de lanzar los workers (on_starting) y marca DB_SCHEMA_READY en el entorno que
+# heredan. Sin gunicorn (uvicorn --workers N, varios contenedores) cada worker
+# lo intenta bajo un lock, y los que llegan después no hacen nada. Los índices
+# añadidos a tablas que ya existían los crea migrations.ensure_indexes.
+import os
+from contextlib import contextmanager
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlmodel import SQLModel
+
+from database import engine, async_engine
+from logging_config import get_logger, shutdown_logging
+from models import User, Task, UserTaskLink
+from clients import Client
+from products import Product
+from product_search import ensure_fulltext_index
+from migrations import ensure_indexes
+from revocation import revoked_tokens
+from jobs import job_queue
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock de fichero
+    fcntl = None
+
+DB_INIT_LOCK_FILE = os.getenv("DB_INIT_LOCK_FILE", os.path.join(os.getenv("TMPDIR", "/tmp"), "app-db-init.lock"))
+DB_INIT_LOCK_TIMEOUT = int(os.getenv("DB_INIT_LOCK_TIMEOUT", "60"))
+SCHEMA_READY_ENV = "DB_SCHEMA_READY"
+
+logger = get_logger("lifecycle")
+
+
+@contextmanager
+def _init_lock():
+    if engine.dialect.name in ("mysql", "mariadb"):
+        # Lock con nombre del servidor: cubre también contenedores en otras máquinas
+        with engine.connect() as conn:
+            acquired = conn.execute(text("SELECT GET_LOCK('app_init_db', :timeout)"), {"timeout": DB_INIT_LOCK_TIMEOUT}).scalar()
+            if not acquired:
+                raise RuntimeError("No se pudo obtener el lock de inicialización de la base de datos")
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT RELEASE_LOCK('app_init_db')"))
+        return
+    if fcntl is None:
+        yield
+        return
+    with open(DB_INIT_LOCK_FILE, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def init_db():
+    if os.getenv(SCHEMA_READY_ENV):
+        # Esquema ya creado por el maestro: sólo se detecta en este proceso el backend de texto
+        # completo y qué índices únicos faltan (ver migrations.unique_enforced)
+        ensure_fulltext_index(engine)
+        ensure_indexes(engine, dry_run=True)
+        return
+    with _init_lock():
+        # create_all comprueba cada tabla antes de crearla: el segundo en entrar no cambia nada
+        SQLModel.metadata.create_all(engine)
+        # Tablas que ya existían: create_all no les añade los índices nuevos
+        ensure_indexes(engine)
+        ensure_fulltext_index(engine)
+    os.environ[SCHEMA_READY_ENV] = "1"
+    logger.info("Esquema de base de datos listo", extra={"dialect": engine.dialect.name})
+
+
+def start_workers():
+    # Hilos de fondo: por worker, después del fork
+    revoked_tokens.start()
+    job_queue.start()
+
+
+async def shutdown():
+    # Las peticiones en vuelo ya terminaron: uvicorn las drena antes del lifespan shutdown
+    revoked_tokens.stop()
+    # Escrituras diferidas pendientes: se aplican antes de cerrar el pool
+    await run_in_threadpool(job_queue.stop)
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
+    logger.info("Aplicación detenida")
+    shutdown_logging()
@@ -0,0 +1,149 @@
+# Logging estructurado (JSON) no bloqueante.
+#
+# Los handlers de la app sólo encolan el registro (QueueHandler); un hilo
+# (QueueListener) redacta secretos, formatea y escribe a stdout. Con DEBUG
+# desactivado, logger.debug(...) cuesta una comparación de niveles.
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" o "text"
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))  # fracción de registros DEBUG que se emiten
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+APP_LOGGER = "app"
+REDACTED = "[REDACTED]"
+
+SENSITIVE_KEYS = {"password", "token", "access_token", "refresh_token", "authorization", "secret", "secret_key"}
+_JWT_RE = re.compile(r"eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*")
+_BEARER_RE = re.compile(r"(?i)(bearer\s+)\S+")
+_KEY_VALUE_RE = re.compile(r"(?i)\b(password|token|access_token|refresh_token|secret_key)(['\"]?\s*[=:]\s*)(['\"]?)[^\s,'\"}]+")
+
+# Atributos estándar de LogRecord: el resto son campos pasados con extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def redact(text: str) -> str:
+    text = _JWT_RE.sub(REDACTED, text)
+    text = _BEARER_RE.sub(r"\1" + REDACTED, text)
+    return _KEY_VALUE_RE.sub(r"\1\2\3" + REDACTED, text)
+
+
+def _redact_value(key: str, value):
+    if key.lower() in SENSITIVE_KEYS:
+        return REDACTED
+    if isinstance(value, dict):
+        return {k: _redact_value(str(k), v) for k, v in value.items()}
+    if isinstance(value, str):
+        return redact(value)
+    return value
+
+
+class RedactingFilter(logging.Filter):
+    # Corre en el hilo del listener: el coste de las regex no toca la petición
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = redact(record.getMessage())
+        record.args = None
+        for key, value in list(vars(record).items()):
+            if key not in _RECORD_ATTRS:
+                setattr(record, key, _redact_value(key, value))
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = redact(record.exc_text)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+_exception_formatter = logging.Formatter()
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    # Si la cola está llena se descarta el registro en lugar de bloquear la petición
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+    def prepare(self, record):
+        # En el hilo que loguea se fijan el mensaje (msg % args) y el traceback en
+        # texto, como QueueHandler.prepare: los argumentos (objetos mutables, ORM)
+        # no se leen más tarde en el listener. La redacción y el JSON, allí
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener = None
+
+
+def setup_logging(level: str = LOG_LEVEL):
+    global _listener
+    if _listener is not None:
+        return _listener
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    output.addFilter(RedactingFilter())
+
+    handler = _DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    handler.addFilter(DebugSamplingFilter(LOG_DEBUG_SAMPLE_RATE))
+
+    logger = logging.getLogger(APP_LOGGER)
+    logger.setLevel(level)
+    logger.addHandler(handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    # Vacía la cola pendiente antes de salir
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{APP_LOGGER}.{name}")
@@ -0,0 +1,153 @@
+# Métricas por ruta (latencia, en vuelo, códigos de estado) y por petición
+# (número de consultas SQL y tiempo en base de datos), en formato Prometheus.
+import bisect
+import contextvars
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestDbStats:
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+# Estadísticas de la petición en curso; los hilos del threadpool heredan el contexto
+_current_request = contextvars.ContextVar("current_request_db_stats", default=None)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = defaultdict(int)  # (method, route, status) -> total
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))  # (method, route)
+        self.queries = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))  # (method, route)
+        self.db_time = defaultdict(float)  # (method, route) -> segundos
+
+    def record(self, method: str, route: str, status: int, elapsed: float, db_stats: RequestDbStats):
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            self.latency[key].observe(elapsed)
+            self.queries[key].observe(db_stats.queries)
+            self.db_time[key] += db_stats.db_time
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    # Middleware ASGI puro: sin envolver Request/Response de Starlette
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        db_stats = RequestDbStats()
+        token = _current_request.set(db_stats)
+        registry.in_flight += 1
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            registry.in_flight -= 1
+            _current_request.reset(token)
+            # Plantilla de la ruta (/clients/{Client_id}), no la URL: cardinalidad acotada
+            route = scope.get("route")
+            registry.record(scope["method"], getattr(route, "path", "unmatched"), status_holder[0], elapsed, db_stats)
+
+
+def instrument_engine(sync_engine):
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        db_stats = _current_request.get()
+        if db_stats is not None:
+            db_stats.queries += 1
+            db_stats.db_time += time.perf_counter() - started
+
+
+def _labels(**labels) -> str:
+    body = ",".join(f'{key}="{str(value)}"' for key, value in labels.items())
+    return "{" + body + "}"
+
+
+def _histogram_lines(name: str, histogram: Histogram, **labels):
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        yield f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}"
+    yield f'{name}_bucket{_labels(**labels, le="+Inf")} {histogram.count}'
+    yield f"{name}_sum{_labels(**labels)} {histogram.sum}"
+    yield f"{name}_count{_labels(**labels)} {histogram.count}"
+
+
+def _extra_lines(metrics: dict, kind: str):
+    # metrics: nombre -> (ayuda, [(etiquetas, valor)]); los contadores llevan el sufijo _total
+    for name, (help_text, samples) in metrics.items():
+        if kind == "counter" and not name.endswith("_total"):
+            name += "_total"
+        yield f"# HELP {name} {help_text}"
+        yield f"# TYPE {name} {kind}"
+        for labels, value in samples:
+            yield f"{name}{_labels(**labels) if labels else ''} {value}"
+
+
+def render_prometheus(extra_gauges: dict = None, extra_counters: dict = None) -> str:
+    lines = []
+    with registry._lock:
+        lines += ["# HELP http_requests_in_flight Peticiones HTTP en curso", "# TYPE http_requests_in_flight gauge",
+                  f"http_requests_in_flight {registry.in_flight}"]
+        lines += ["# HELP http_requests_total Peticiones HTTP por ruta y estado", "# TYPE http_requests_total counter"]
+        for (method, route, status), total in sorted(registry.requests.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {total}")
+        lines += ["# HELP http_request_duration_seconds Latencia por ruta", "# TYPE http_request_duration_seconds histogram"]
+        for (method, route), histogram in sorted(registry.latency.items()):
+            lines += _histogram_lines("http_request_duration_seconds", histogram, method=method, route=route)
+        lines += ["# HELP db_queries_per_request Sentencias SQL por petición", "# TYPE db_queries_per_request histogram"]
+        for (method, route), histogram in sorted(registry.queries.items()):
+            lines += _histogram_lines("db_queries_per_request", histogram, method=method, route=route)
+        lines += ["# HELP db_time_seconds_total Tiempo en base de datos por ruta", "# TYPE db_time_seconds_total counter"]
+        for (method, route), seconds in sorted(registry.db_time.items()):
+            lines.append(f"db_time_seconds_total{_labels(method=method, route=route)} {seconds}")
+    lines += _extra_lines(extra_gauges or {}, "gauge")
+    lines += _extra_lines(extra_counters or {}, "counter")
+    return "\n".join(lines) + "\n"
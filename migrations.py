@@ -0,0 +1,114 @@
+# Índices que faltan en bases ya existentes.
+#
+# create_all sólo crea los índices de las tablas nuevas: una base creada con
+# una versión anterior (db.db, MariaDB en producción) no recibe los índices
+# añadidos después a los modelos. ensure_indexes compara los índices de
+# SQLModel.metadata con los de la base y crea los que faltan; es idempotente
+# y se ejecuta en el arranque (lifecycle.init_db) o a mano:
+#
+#   python migrations.py            # crea los índices que falten
+#   python migrations.py --check    # sólo informa; código 1 si hay algo pendiente
+#
+# Un índice único no se crea si la tabla tiene valores repetidos: se informa de
+# los duplicados (hay que resolverlos a mano), el resto de la migración sigue y,
+# mientras falte el índice, las altas comprueban el email antes de escribir
+# (unique_enforced) y /health lo informa.
+import argparse
+import sys
+
+from sqlalchemy import func, inspect, select
+from sqlmodel import SQLModel
+
+from logging_config import get_logger
+import models  # noqa: F401  (registra las tablas en SQLModel.metadata)
+import clients  # noqa: F401
+import products  # noqa: F401
+
+DUPLICATES_SAMPLE = 5
+
+# Índices únicos que faltan en la base -> muestra de duplicados (vacía si sólo falta crearlo)
+missing_unique = {}
+
+logger = get_logger("migrations")
+
+
+def missing_indexes(conn):
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in SQLModel.metadata.sorted_tables:
+        if table.name not in tables:
+            continue  # la crea create_all, con todos sus índices
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name in existing:
+                continue
+            if index.dialect_options["mysql"]["prefix"] == "FULLTEXT" and conn.dialect.name not in ("mysql", "mariadb"):
+                continue  # en SQLite el texto completo es product_fts (ver product_search.py)
+            missing.append(index)
+    return missing
+
+
+def find_duplicates(conn, index):
+    # Valores repetidos que impedirían crear el índice único (una muestra)
+    columns = list(index.columns)
+    statement = (
+        select(*columns, func.count().label("veces"))
+        .group_by(*columns)
+        .having(func.count() > 1)
+        .order_by(func.count().desc())
+        .limit(DUPLICATES_SAMPLE)
+    )
+    return [dict(row._mapping) for row in conn.execute(statement)]
+
+
+def ensure_indexes(engine, dry_run: bool = False) -> dict:
+    report = {"created": [], "pending": [], "blocked": {}}
+    with engine.connect() as conn:
+        indexes = missing_indexes(conn)
+        for index in indexes:
+            if index.unique:
+                duplicates = find_duplicates(conn, index)
+                if duplicates:
+                    report["blocked"][index.name] = duplicates
+                    logger.error("Índice único no creado: hay valores repetidos",
+                                 extra={"index": index.name, "duplicates": duplicates})
+                    continue
+            if dry_run:
+                report["pending"].append(index.name)
+                continue
+            index.create(conn)
+            conn.commit()  # uno a uno: un fallo no deshace los índices ya creados
+            report["created"].append(index.name)
+            logger.info("Índice creado", extra={"index": index.name})
+    missing_unique.clear()
+    missing_unique.update(report["blocked"])
+    missing_unique.update((index.name, []) for index in indexes if index.unique and index.name in report["pending"])
+    return report
+
+
+def unique_enforced(index_name: str) -> bool:
+    # False mientras el índice único no exista: el llamante debe comprobar antes de escribir
+    return index_name not in missing_unique
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crea los índices de los modelos que falten en la base de datos")
+    parser.add_argument("--check", action="store_true", help="no crear nada, sólo informar")
+    args = parser.parse_args()
+
+    from database import engine
+    report = ensure_indexes(engine, dry_run=args.check)
+    for name in report["created"]:
+        print(f"creado     {name}")
+    for name in report["pending"]:
+        print(f"pendiente  {name}")
+    for name, duplicates in report["blocked"].items():
+        print(f"bloqueado  {name}: valores repetidos, p. ej. {duplicates}")
+    if not any(report.values()):
+        print("sin cambios: todos los índices existen")
+    sys.exit(1 if report["pending"] or report["blocked"] else 0)
+
+
+if __name__ == "__main__":
+    main()
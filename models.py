@@ -1,5 +1,6 @@
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 
 class UserTaskLink(SQLModel, table=True):
     user_id: Optional[int] = Field(default=None, foreign_key="user.id", primary_key=True)
@@ -12,6 +13,9 @@ class Task(SQLModel, table=True):
     users: List["User"] = Relationship(back_populates="tasks", link_model=UserTaskLink)
 
 class User(SQLModel, table=True):
+    # Email único: login lo busca por índice y el alta detecta duplicados sin consultar antes (ver migrations.py)
+    __table_args__ = (Index("ix_user_email", "email", unique=True),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     email: str
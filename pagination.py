@@ -0,0 +1,74 @@
+# Paginación por cursor (keyset) sobre id o (columna, id).
+# El cursor es opaco para el cliente: JSON en base64 con el último valor visto.
+import base64
+import json
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: dict) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, dict) or "id" not in values:
+            raise ValueError(cursor)
+        return values
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def keyset(statement, model, order_by: str = "id", cursor: Optional[str] = None):
+    # Ordena por (order_by, id) y salta directamente a lo posterior al cursor,
+    # usando el índice en lugar de recorrer y descartar filas como OFFSET.
+    # Los NULL van primero en orden ascendente (SQLite y MariaDB).
+    id_col = model.id
+    if order_by == "id":
+        statement = statement.order_by(id_col)
+        if cursor:
+            statement = statement.where(id_col > decode_cursor(cursor)["id"])
+        return statement
+
+    col = getattr(model, order_by)
+    statement = statement.order_by(col, id_col)
+    if cursor:
+        values = decode_cursor(cursor)
+        if values.get("order_by", order_by) != order_by:
+            raise HTTPException(status_code=400, detail="El cursor no corresponde a este orden")
+        last_value, last_id = values.get("value"), values["id"]
+        if last_value is None:
+            statement = statement.where(or_(and_(col.is_(None), id_col > last_id), col.is_not(None)))
+        else:
+            statement = statement.where(or_(col > last_value, and_(col == last_value, id_col > last_id)))
+    return statement
+
+
+def next_cursor(rows, order_by: str, limit: int) -> Optional[str]:
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    if order_by == "id":
+        return encode_cursor({"id": last.id})
+    return encode_cursor({"order_by": order_by, "value": getattr(last, order_by), "id": last.id})
+
+
+def paginate(statement, model, limit: int, skip: int = 0, cursor: Optional[str] = None, order_by: str = "id"):
+    statement = keyset(statement, model, order_by, cursor)
+    if skip and not cursor:
+        # Compatibilidad con clientes que aún paginan con skip
+        statement = statement.offset(skip)
+    return statement.limit(limit)
+
+
+def set_next_cursor(response: Response, rows, order_by: str, limit: int):
+    cursor = next_cursor(rows, order_by, limit)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
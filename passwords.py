@@ -0,0 +1,91 @@
+# Hash de contraseñas (PBKDF2-SHA256 de la stdlib) ejecutado en un pool acotado
+# de hilos, más control de admisión para /login.
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+PASSWORD_HASH_ALGORITHM = "pbkdf2_sha256"
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "600000"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+LOGIN_MAX_CONCURRENCY = int(os.getenv("LOGIN_MAX_CONCURRENCY", str(PASSWORD_HASH_WORKERS * 4)))
+LOGIN_QUEUE_TIMEOUT = float(os.getenv("LOGIN_QUEUE_TIMEOUT", "2"))  # segundos esperando turno antes del 503
+
+# hashlib libera el GIL mientras calcula: los hilos del pool no frenan al resto de la app
+hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode().rstrip("=")
+
+
+def _unb64(value: str) -> bytes:
+    return base64.b64decode(value + "=" * (-len(value) % 4))
+
+
+def hash_password(password: str, iterations: int = None) -> str:
+    iterations = iterations or PASSWORD_HASH_ITERATIONS
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return f"{PASSWORD_HASH_ALGORITHM}${iterations}${_b64(salt)}${_b64(digest)}"
+
+
+def is_hashed(stored: str) -> bool:
+    return stored.startswith(PASSWORD_HASH_ALGORITHM + "$")
+
+
+def verify_password(password: str, stored: str) -> bool:
+    if not is_hashed(stored):
+        # Contraseña heredada en texto plano: se re-hashea en el próximo login
+        return hmac.compare_digest(password.encode(), stored.encode())
+    try:
+        _, iterations, salt, digest = stored.split("$")
+        candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), _unb64(salt), int(iterations))
+    except ValueError:
+        return False
+    return hmac.compare_digest(candidate, _unb64(digest))
+
+
+def needs_rehash(stored: str) -> bool:
+    if not is_hashed(stored):
+        return True
+    try:
+        return int(stored.split("$")[1]) != PASSWORD_HASH_ITERATIONS
+    except (IndexError, ValueError):
+        return True
+
+
+# Hash de referencia para emails inexistentes: el tiempo de respuesta no delata si el usuario existe
+DUMMY_HASH = hash_password(secrets.token_hex(8), iterations=PASSWORD_HASH_ITERATIONS)
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_executor, hash_password, password)
+
+
+async def verify_password_async(password: str, stored: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_executor, verify_password, password, stored)
+
+
+_login_slots = asyncio.Semaphore(LOGIN_MAX_CONCURRENCY)
+
+
+@asynccontextmanager
+async def login_admission():
+    # Limita los logins en curso; el resto espera hasta LOGIN_QUEUE_TIMEOUT y luego recibe 503
+    try:
+        await asyncio.wait_for(_login_slots.acquire(), timeout=LOGIN_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Demasiados logins simultáneos, reintente", headers={"Retry-After": "1"})
+    try:
+        yield
+    finally:
+        _login_slots.release()
@@ -0,0 +1,199 @@
+# Conteos por faceta (GET /products/facets): categoria, subcategoria, marca,
+# tramo de precio y activo, para cualquier combinación de filtros de búsqueda.
+#
+# Todas las facetas salen de una sola consulta (UNION ALL de GROUP BY sobre el
+# conjunto filtrado). Sobre el catálogo completo se guarda además una
+# instantánea que las escrituras actualizan por delta, así que la petición sin
+# filtros no toca la base de datos. Los resultados filtrados se cachean con la
+# generación de la instantánea: cualquier escritura los invalida.
+#
+# Quien escribe llama a begin() antes del commit y pasa su valor a apply(): si
+# la instantánea se construyó después de begin() puede incluir ya la escritura,
+# y en lugar de aplicar el delta (se contaría dos veces) se descarta.
+#
+# La instantánea es por proceso; FACET_SNAPSHOT_TTL acota el desfase con las
+# escrituras hechas por otros workers.
+import bisect
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import case, literal, select, union_all, func
+from sqlmodel import Session
+
+from products import Product
+from product_search import ProductFilters, apply_filters
+
+FACET_PRICE_BUCKETS = tuple(float(edge) for edge in os.getenv("FACET_PRICE_BUCKETS", "50,100,250,500,1000").split(","))
+FACET_SNAPSHOT_TTL = int(os.getenv("FACET_SNAPSHOT_TTL", "300"))
+FACET_CACHE_MAXSIZE = int(os.getenv("FACET_CACHE_MAXSIZE", "1000"))
+
+FACETS = ("categoria", "subcategoria", "marca", "precio", "activo")
+NULL_KEY = "null"
+
+
+class ProductFacets(BaseModel):
+    total: int
+    categoria: Dict[str, int]
+    subcategoria: Dict[str, int]
+    marca: Dict[str, int]
+    precio: Dict[str, int]
+    activo: Dict[str, int]
+
+
+def _edge(value: float) -> str:
+    return f"{value:g}"
+
+
+def _price_labels():
+    edges = FACET_PRICE_BUCKETS
+    labels = [f"<{_edge(edges[0])}"]
+    labels += [f"{_edge(lo)}-{_edge(hi)}" for lo, hi in zip(edges, edges[1:])]
+    labels.append(f">={_edge(edges[-1])}")
+    return labels
+
+
+PRICE_LABELS = _price_labels()
+
+
+def price_bucket(precio: Optional[float]) -> str:
+    if precio is None:
+        return NULL_KEY
+    return PRICE_LABELS[bisect.bisect_right(FACET_PRICE_BUCKETS, precio)]
+
+
+def facet_values(product) -> dict:
+    # Valores de faceta de un Product (o de un dict con sus columnas)
+    get = product.get if isinstance(product, dict) else lambda field: getattr(product, field)
+    values = {field: get(field) for field in ("categoria", "subcategoria", "marca")}
+    values = {field: NULL_KEY if value is None else str(value) for field, value in values.items()}
+    values["precio"] = price_bucket(get("precio"))
+    values["activo"] = "true" if get("activo") else "false"
+    return values
+
+
+def facets_query(filters: ProductFilters):
+    filtered = apply_filters(
+        select(Product.categoria, Product.subcategoria, Product.marca, Product.precio, Product.activo), filters
+    ).cte("filtered")
+    # El mismo tramo que price_bucket(): límite inferior incluido
+    bucket = case(
+        (filtered.c.precio.is_(None), NULL_KEY),
+        *[(filtered.c.precio < edge, label) for edge, label in zip(FACET_PRICE_BUCKETS, PRICE_LABELS)],
+        else_=PRICE_LABELS[-1],
+    )
+    activo = case((filtered.c.activo == True, "true"), else_="false")  # noqa: E712
+    branches = []
+    for name, column in (("categoria", filtered.c.categoria), ("subcategoria", filtered.c.subcategoria),
+                         ("marca", filtered.c.marca), ("precio", bucket), ("activo", activo)):
+        branches.append(
+            select(literal(name).label("facet"), column.label("value"), func.count().label("n")).group_by(column)
+        )
+    return union_all(*branches)
+
+
+def count_facets(session: Session, filters: ProductFilters) -> dict:
+    counts = {facet: {} for facet in FACETS}
+    for facet, value, n in session.execute(facets_query(filters)):
+        counts[facet][NULL_KEY if value is None else str(value)] = n
+    counts["total"] = sum(counts["activo"].values())
+    return counts
+
+
+class FacetSnapshot:
+    def __init__(self, ttl: int = FACET_SNAPSHOT_TTL, maxsize: int = FACET_CACHE_MAXSIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._counts = None  # facet -> Counter, sólo para el catálogo sin filtros
+        self._counts_generation = 0  # generación con la que se leyó _counts
+        self._built_at = 0.0
+        self._filtered = OrderedDict()  # filtros -> (generation, built_at, counts)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(filters: ProductFilters):
+        return tuple(sorted(filters.dict().items()))
+
+    def get(self, session: Session, filters: ProductFilters) -> dict:
+        key = self._key(filters)
+        unfiltered = all(value is None for _, value in key)
+        now = time.monotonic()
+        with self._lock:
+            generation = self.generation
+            if unfiltered and self._counts is not None and now - self._built_at < self.ttl:
+                self.hits += 1
+                return self._render(self._counts)
+            entry = self._filtered.get(key)
+            if not unfiltered and entry is not None and entry[0] == generation and now - entry[1] < self.ttl:
+                self.hits += 1
+                self._filtered.move_to_end(key)
+                return entry[2]
+            self.misses += 1
+        counts = count_facets(session, filters)
+        with self._lock:
+            # Si hubo una escritura durante la consulta el resultado puede no incluirla: no se guarda
+            if generation == self.generation:
+                if unfiltered:
+                    self._counts = {facet: Counter(counts[facet]) for facet in FACETS}
+                    self._counts_generation = generation
+                    self._built_at = now
+                else:
+                    self._filtered[key] = (generation, now, counts)
+                    self._filtered.move_to_end(key)
+                    while len(self._filtered) > self.maxsize:
+                        self._filtered.popitem(last=False)
+        return counts
+
+    @staticmethod
+    def _render(counts) -> dict:
+        rendered = {facet: dict(counts[facet]) for facet in FACETS}
+        rendered["total"] = sum(rendered["activo"].values())
+        return rendered
+
+    def begin(self) -> int:
+        # Antes del commit: una lectura en curso ya no guardará su resultado y
+        # apply() sabrá si la instantánea es posterior a la escritura
+        with self._lock:
+            self.generation += 1
+            return self.generation
+
+    def apply(self, since: int, old: Optional[dict] = None, new: Optional[dict] = None):
+        # since: valor de begin(); old/new: facet_values() antes y después de la escritura (None en alta/baja)
+        with self._lock:
+            self.generation += 1
+            self._filtered.clear()
+            if self._counts is not None and self._counts_generation >= since:
+                self._counts = None  # leída después de begin(): puede incluir ya la escritura
+            if self._counts is None:
+                return
+            for values, delta in ((old, -1), (new, 1)):
+                if values is None:
+                    continue
+                for facet in FACETS:
+                    counter = self._counts[facet]
+                    counter[values[facet]] += delta
+                    if counter[values[facet]] <= 0:
+                        del counter[values[facet]]
+
+    def invalidate(self):
+        # Escrituras cuyo estado previo no se conoce (bulk upsert): se recalcula en la próxima lectura
+        with self._lock:
+            self.generation += 1
+            self._filtered.clear()
+            self._counts = None
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "generation": self.generation}
+
+
+product_facets = FacetSnapshot()
+
+
+def get_facets(session: Session, filters: ProductFilters) -> dict:
+    return product_facets.get(session, filters)
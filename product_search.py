@@ -0,0 +1,119 @@
+# Búsqueda y filtrado de productos (GET /products/search).
+#
+# Texto completo: FTS5 en SQLite (tabla virtual product_fts mantenida por
+# triggers), FULLTEXT en MariaDB/MySQL; si ninguno está disponible se cae a
+# prefijo sobre nombre, que usa ix_product_nombre_id.
+import re
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+
+from products import Product
+from pagination import paginate, next_cursor
+from logging_config import get_logger
+
+logger = get_logger("products.search")
+
+ProductSort = Literal["id", "precio", "nombre", "fecha_actualizacion"]
+
+SEARCH_MAX_LIMIT = 100
+
+# Se activa en ensure_fulltext_index() según el motor
+FULLTEXT = {"backend": None}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class ProductFilters(BaseModel):
+    categoria: Optional[str] = None
+    subcategoria: Optional[str] = None
+    marca: Optional[str] = None
+    precio_min: Optional[float] = None
+    precio_max: Optional[float] = None
+    activo: Optional[bool] = None
+    q: Optional[str] = None
+
+
+class ProductSearchPage(BaseModel):
+    items: List[Product]
+    next_cursor: Optional[str] = None
+
+
+def ensure_fulltext_index(engine):
+    # Idempotente: crea la tabla y los triggers la primera vez y, en cada proceso,
+    # activa el backend de texto completo que corresponda
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        try:
+            with engine.begin() as conn:
+                exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'product_fts'")).first()
+                if not exists:
+                    conn.execute(text(
+                        "CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5("
+                        "nombre, descripcion, content='product', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+                    ))
+                    conn.execute(text(
+                        "CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN "
+                        "INSERT INTO product_fts(rowid, nombre, descripcion) VALUES (new.id, new.nombre, new.descripcion); END"
+                    ))
+                    conn.execute(text(
+                        "CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN "
+                        "INSERT INTO product_fts(product_fts, rowid, nombre, descripcion) VALUES ('delete', old.id, old.nombre, old.descripcion); END"
+                    ))
+                    conn.execute(text(
+                        "CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF nombre, descripcion ON product BEGIN "
+                        "INSERT INTO product_fts(product_fts, rowid, nombre, descripcion) VALUES ('delete', old.id, old.nombre, old.descripcion); "
+                        "INSERT INTO product_fts(rowid, nombre, descripcion) VALUES (new.id, new.nombre, new.descripcion); END"
+                    ))
+                    # Indexar los productos ya existentes
+                    conn.execute(text("INSERT INTO product_fts(product_fts) VALUES ('rebuild')"))
+            FULLTEXT["backend"] = "fts5"
+        except OperationalError as e:
+            logger.warning("FTS5 no disponible, búsqueda por prefijo: %s", e)
+    elif dialect in ("mysql", "mariadb"):
+        FULLTEXT["backend"] = "mysql"
+
+
+def _fulltext_condition(q: str):
+    tokens = _TOKEN_RE.findall(q)
+    if not tokens:
+        return None
+    backend = FULLTEXT["backend"]
+    if backend == "fts5":
+        # Cada término como prefijo: "zapa" encuentra "zapatilla"
+        match = " ".join('"' + token.replace('"', '') + '"*' for token in tokens)
+        return text("product.id IN (SELECT rowid FROM product_fts WHERE product_fts MATCH :fts_query)").bindparams(fts_query=match)
+    if backend == "mysql":
+        match = " ".join("+" + token + "*" for token in tokens)
+        return text("MATCH (product.nombre, product.descripcion) AGAINST (:fts_query IN BOOLEAN MODE)").bindparams(fts_query=match)
+    return Product.nombre.like(q.replace("%", r"\%").replace("_", r"\_") + "%", escape="\\")
+
+
+def apply_filters(statement, filters: ProductFilters):
+    if filters.categoria is not None:
+        statement = statement.where(Product.categoria == filters.categoria)
+    if filters.subcategoria is not None:
+        statement = statement.where(Product.subcategoria == filters.subcategoria)
+    if filters.marca is not None:
+        statement = statement.where(Product.marca == filters.marca)
+    if filters.precio_min is not None:
+        statement = statement.where(Product.precio >= filters.precio_min)
+    if filters.precio_max is not None:
+        statement = statement.where(Product.precio <= filters.precio_max)
+    if filters.activo is not None:
+        statement = statement.where(Product.activo == filters.activo)
+    if filters.q:
+        condition = _fulltext_condition(filters.q)
+        if condition is not None:
+            statement = statement.where(condition)
+    return statement
+
+
+def search_products(session: Session, filters: ProductFilters, sort: ProductSort = "id", cursor: Optional[str] = None, limit: int = 50) -> ProductSearchPage:
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    statement = apply_filters(select(Product), filters)
+    items = session.exec(paginate(statement, Product, limit, cursor=cursor, order_by=sort)).all()
+    return ProductSearchPage(items=items, next_cursor=next_cursor(items, sort, limit))
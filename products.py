@@ -1,7 +1,23 @@
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 
 class Product(SQLModel, table=True):
+    # Índices para la paginación por cursor (ver pagination.py) y la búsqueda
+    __table_args__ = (
+        Index("ix_product_activo_id", "activo", "id"),
+        Index("ix_product_fecha_actualizacion_id", "fecha_actualizacion", "id"),
+        Index("ix_product_activo_fecha_actualizacion_id", "activo", "fecha_actualizacion", "id"),
+        # Búsqueda (ver product_search.py): filtro por igualdad + rango/orden por precio
+        Index("ix_product_categoria_precio_id", "categoria", "precio", "id"),
+        Index("ix_product_categoria_subcategoria_precio_id", "categoria", "subcategoria", "precio", "id"),
+        Index("ix_product_marca_precio_id", "marca", "precio", "id"),
+        Index("ix_product_activo_precio_id", "activo", "precio", "id"),
+        Index("ix_product_precio_id", "precio", "id"),
+        Index("ix_product_nombre_id", "nombre", "id"),
+        Index("ix_product_fulltext", "nombre", "descripcion", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
+
     id: int = Field(default=None, primary_key=True)
     nombre: str
     descripcion: Optional[str] = None
@@ -0,0 +1,188 @@
+# Rate limiting y admisión de peticiones.
+#
+# - RateLimiter: token bucket por clave (usuario + ruta en clientes/productos,
+#   IP en /login). El store en memoria es por worker; con RATE_LIMIT_BACKEND=redis
+#   los límites se comparten entre workers con un contador de ventana deslizante
+#   (dos ventanas fijas ponderadas), a costa de un viaje a Redis por petición.
+#   Las dependencias async usan check_async: con Redis la llamada va al
+#   threadpool para que un Redis lento no bloquee el event loop.
+# - AdmissionMiddleware: acota las peticiones en curso en todo el proceso; las
+#   que no consiguen hueco en ADMISSION_QUEUE_TIMEOUT reciben 503 antes de tocar
+#   el pool de conexiones.
+import asyncio
+import math
+import os
+import threading
+import time
+from typing import Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from cache import FakeRedis, REDIS_URL
+from database import DB_POOL_SIZE, DB_MAX_OVERFLOW
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory", "redis", "fake-redis" o "none"
+RATE_LIMIT_USER_RATE = float(os.getenv("RATE_LIMIT_USER_RATE", "20"))  # peticiones/s sostenidas por usuario y ruta
+RATE_LIMIT_USER_BURST = int(os.getenv("RATE_LIMIT_USER_BURST", "40"))
+RATE_LIMIT_LOGIN_RATE = float(os.getenv("RATE_LIMIT_LOGIN_RATE", "0.2"))  # intentos/s por IP (12 por minuto)
+RATE_LIMIT_LOGIN_BURST = int(os.getenv("RATE_LIMIT_LOGIN_BURST", "10"))
+RATE_LIMIT_SWEEP_SECONDS = 60
+
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", str(2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW))))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "1.0"))
+ADMISSION_EXEMPT_PATHS = {"/", "/health", "/metrics", "/metrics/pool"}
+
+admission_stats = {"rejected": 0}
+
+
+class MemoryRateLimitStore:
+    blocking = False
+
+    def __init__(self):
+        self._buckets = {}  # clave -> [tokens, último acceso, instante en que vuelve a estar lleno]
+        self._next_sweep = time.monotonic() + RATE_LIMIT_SWEEP_SECONDS
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = burst
+            else:
+                tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            if now >= self._next_sweep:
+                self._sweep(now)
+            if tokens < 1:
+                self._buckets[key] = [tokens, now, now + (burst - tokens) / rate]
+                return False, (1 - tokens) / rate
+            tokens -= 1
+            self._buckets[key] = [tokens, now, now + (burst - tokens) / rate]
+            return True, 0.0
+
+    def _sweep(self, now: float):
+        # Un bucket lleno equivale a uno inexistente: se descarta para acotar la memoria
+        self._next_sweep = now + RATE_LIMIT_SWEEP_SECONDS
+        for key in [key for key, bucket in self._buckets.items() if bucket[2] <= now]:
+            del self._buckets[key]
+
+
+class RedisRateLimitStore:
+    # Ventana deslizante aproximada: burst peticiones por ventana de burst/rate segundos
+    blocking = True
+
+    def __init__(self, client, prefix: str = "ratelimit"):
+        self.client = client
+        self.prefix = prefix
+
+    def hit(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        window = burst / rate
+        now = time.time()
+        current = int(now // window)
+        elapsed = now - current * window
+        current_key = f"{self.prefix}:{key}:{current}"
+        # Un solo viaje a Redis; el EXPIRE se renueva en cada petición (la clave es de una sola ventana)
+        pipe = self.client.pipeline()
+        pipe.incr(current_key)
+        pipe.expire(current_key, math.ceil(2 * window))
+        pipe.get(f"{self.prefix}:{key}:{current - 1}")
+        count, _, previous = pipe.execute()
+        previous = int(previous or 0)
+        estimated = previous * (window - elapsed) / window + count
+        if estimated > burst:
+            return False, max(1 / rate, window - elapsed)
+        return True, 0.0
+
+
+class NullRateLimitStore:
+    blocking = False
+
+    def hit(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        return True, 0.0
+
+
+def make_store(name: str = RATE_LIMIT_BACKEND):
+    if name == "redis":
+        import redis  # dependencia opcional: sólo con RATE_LIMIT_BACKEND=redis
+        return RedisRateLimitStore(redis.Redis.from_url(REDIS_URL))
+    if name == "fake-redis":
+        return RedisRateLimitStore(FakeRedis())
+    if name == "none":
+        return NullRateLimitStore()
+    return MemoryRateLimitStore()
+
+
+class RateLimiter:
+    def __init__(self, name: str, rate: float, burst: int, store):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.store = store
+        self.rejected = 0
+
+    def check(self, key: str):
+        if self.rate <= 0:
+            return
+        allowed, retry_after = self.store.hit(f"{self.name}:{key}", self.rate, self.burst)
+        if not allowed:
+            self.rejected += 1
+            raise HTTPException(status_code=429, detail="Demasiadas peticiones, reintente más tarde",
+                                headers={"Retry-After": str(math.ceil(retry_after))})
+
+    async def check_async(self, key: str):
+        if self.store.blocking:
+            await run_in_threadpool(self.check, key)
+        else:
+            self.check(key)
+
+
+_store = make_store()
+user_limiter = RateLimiter("user", RATE_LIMIT_USER_RATE, RATE_LIMIT_USER_BURST, _store)
+login_limiter = RateLimiter("login", RATE_LIMIT_LOGIN_RATE, RATE_LIMIT_LOGIN_BURST, _store)
+
+
+def route_key(request) -> str:
+    # Plantilla de la ruta (/clients/{Client_id}), no la URL: un bucket por endpoint
+    route = request.scope.get("route")
+    return f"{request.method}:{getattr(route, 'path', request.url.path)}"
+
+
+def client_ip(request) -> str:
+    # Detrás de un proxy, uvicorn/gunicorn reescriben client con X-Forwarded-For (forwarded_allow_ips)
+    return request.client.host if request.client else "unknown"
+
+
+class AdmissionMiddleware:
+    # Middleware ASGI puro; un hueco libre se toma sin ceder el event loop
+    def __init__(self, app, max_in_flight: int = ADMISSION_MAX_IN_FLIGHT, queue_timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_in_flight) if max_in_flight > 0 else None
+
+    async def __call__(self, scope, receive, send):
+        if self._slots is None or scope["type"] != "http" or scope["path"] in ADMISSION_EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        if self._slots.locked():
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                admission_stats["rejected"] += 1
+                await _reject(send)
+                return
+        else:
+            await self._slots.acquire()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._slots.release()
+
+
+async def _reject(send):
+    body = b'{"detail":"Servidor saturado, reintente"}'
+    await send({"type": "http.response.start", "status": 503, "headers": [
+        (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), (b"retry-after", b"1"),
+    ]})
+    await send({"type": "http.response.body", "body": body})
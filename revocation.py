@@ -0,0 +1,150 @@
+# Lista de revocación de tokens (logout, rotación de refresh tokens) por jti.
+#
+# Cada worker guarda los jti revocados en memoria, agrupados en cubetas por
+# hora de expiración: comprobar un token es una consulta a un dict, sin I/O, y
+# purgar es tirar las cubetas cuyo último instante ya pasó (un token expirado
+# lo rechaza el propio JWT). Con REVOCATION_BACKEND=redis las revocaciones se
+# publican en un conjunto ordenado compartido y un hilo por worker las trae
+# cada REVOCATION_SYNC_INTERVAL segundos.
+import math
+import os
+import threading
+import time
+from typing import Optional
+
+from cache import FakeRedis, REDIS_URL
+from logging_config import get_logger
+
+REVOCATION_BACKEND = os.getenv("REVOCATION_BACKEND", "memory")  # "memory", "redis" o "fake-redis"
+REVOCATION_BUCKET_SECONDS = int(os.getenv("REVOCATION_BUCKET_SECONDS", "60"))
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "2"))
+# Vida máxima de un token (la del refresh token) más margen: lo que se conserva en el store compartido
+REVOCATION_RETENTION = int(os.getenv("REVOCATION_RETENTION", str(8 * 24 * 3600)))
+REVOCATION_KEY = "revoked_jti"
+
+logger = get_logger("auth.revocation")
+
+
+class RedisRevocationStore:
+    # Conjunto ordenado: miembro "jti:exp", puntuación = instante de la revocación
+    def __init__(self, client, key: str = REVOCATION_KEY, retention: int = REVOCATION_RETENTION):
+        self.client = client
+        self.key = key
+        self.retention = retention
+
+    def add(self, jti: str, exp: float, revoked_at: float) -> bool:
+        # NX: una revocación previa (de cualquier worker) no se sobrescribe; True si es nueva
+        return self.client.zadd(self.key, {f"{jti}:{exp}": revoked_at}, nx=True) == 1
+
+    def since(self, revoked_after: float):
+        for member in self.client.zrangebyscore(self.key, revoked_after, "+inf"):
+            jti, _, exp = member.decode().rpartition(":")
+            yield jti, float(exp)
+
+    def purge(self, now: float):
+        self.client.zremrangebyscore(self.key, "-inf", now - self.retention)
+
+
+def make_store(name: str = REVOCATION_BACKEND):
+    if name == "redis":
+        import redis  # dependencia opcional: sólo con REVOCATION_BACKEND=redis
+        return RedisRevocationStore(redis.Redis.from_url(REDIS_URL))
+    if name == "fake-redis":
+        return RedisRevocationStore(FakeRedis())
+    return None
+
+
+class RevocationList:
+    def __init__(self, store=None, bucket_seconds: int = REVOCATION_BUCKET_SECONDS,
+                 sync_interval: float = REVOCATION_SYNC_INTERVAL):
+        self.store = store
+        self.bucket_seconds = bucket_seconds
+        self.sync_interval = sync_interval
+        self._jtis = {}  # jti -> cubeta
+        self._buckets = {}  # cubeta -> set(jti)
+        self._next_purge = 0.0
+        self._lock = threading.Lock()
+        self._last_sync = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _bucket(self, exp: float) -> int:
+        return math.ceil(exp / self.bucket_seconds)
+
+    def _add_local(self, jti: str, exp: float) -> bool:
+        bucket = self._bucket(exp)
+        with self._lock:
+            if jti in self._jtis:
+                return False
+            self._jtis[jti] = bucket
+            self._buckets.setdefault(bucket, set()).add(jti)
+            return True
+
+    def revoke(self, jti: Optional[str], exp: Optional[float]) -> bool:
+        # True sólo para quien revoca el jti por primera vez (en este worker y, con
+        # store compartido, en todos): la rotación de refresh tokens se apoya en ello.
+        # Tokens sin jti (emitidos antes de la lista) o ya expirados no se revocan
+        if not jti or exp is None or exp <= time.time():
+            return False
+        if not self._add_local(jti, exp):
+            return False
+        if self.store is not None:
+            return self.store.add(jti, exp, time.time())
+        return True
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if not jti:
+            return False
+        now = time.time()
+        if now >= self._next_purge:
+            self.purge(now)
+        return jti in self._jtis
+
+    def purge(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        # Una cubeta vence cuando su último instante (cubeta * bucket_seconds) ya pasó
+        current = math.floor(now / self.bucket_seconds)
+        with self._lock:
+            self._next_purge = now + self.bucket_seconds
+            for bucket in [bucket for bucket in self._buckets if bucket <= current]:
+                for jti in self._buckets.pop(bucket):
+                    del self._jtis[jti]
+
+    def sync(self):
+        # Trae las revocaciones de otros workers; el solape de 5 s cubre desfases de reloj
+        now = time.time()
+        for jti, exp in self.store.since(self._last_sync - 5):
+            if exp > now:
+                self._add_local(jti, exp)
+        self._last_sync = now
+        self.store.purge(now)
+
+    def _run(self):
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Error al sincronizar la lista de revocación")
+
+    def start(self):
+        # Por worker (tras el fork), desde el lifespan
+        if self.store is None or self._thread is not None:
+            return
+        self._last_sync = time.time() - self.store.retention
+        self.sync()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="revocation-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=self.sync_interval + 1)
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._jtis), "buckets": len(self._buckets), "shared": self.store is not None}
+
+
+revoked_tokens = RevocationList(make_store())
@@ -1,16 +1,16 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 class TaskRead(BaseModel):
     id: int
     title: str
-    description: str
+    description: Optional[str] = None
 
 class UserRead(BaseModel):
     id: int
     name: str
     email: str
-    tasks: List[TaskRead]
+    tasks: List[TaskRead] = []
 
 class UserCreate(BaseModel):
     name: str
@@ -0,0 +1,32 @@
+# Base temporal sembrada y app importada una sola vez por sesión: los módulos
+# leen DATABASE_URL y el resto de la configuración al importarse, así que el
+# entorno se fija aquí, antes de que ningún test importe la app.
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from common import temp_database, seed, import_app, BENCH_EMAIL, BENCH_PASSWORD  # noqa: E402
+
+DATABASE_URL = temp_database(copy_from=None)
+seed(DATABASE_URL, clients=50, products=50, users=200, tasks=50, tasks_per_user=5)
+app = import_app(DATABASE_URL, PASSWORD_HASH_ITERATIONS=1000, LOG_LEVEL="WARNING")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def headers(client):
+    r = client.post("/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    r.raise_for_status()
+    return {"Authorization": "Bearer " + r.json()["access_token"]}
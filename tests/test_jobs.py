@@ -0,0 +1,114 @@
+import time
+
+from sqlmodel import Session
+
+from clients import Client
+from database import engine
+from jobs import JobQueue, MemoryJobBroker, SQLiteJobBroker
+
+
+def _wait(queue: JobQueue, job_ids, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        jobs = [queue.get(job_id) for job_id in job_ids]
+        if all(job["status"] in ("done", "failed") for job in jobs):
+            return jobs
+        time.sleep(0.01)
+    raise AssertionError(f"trabajos sin terminar: {jobs}")
+
+
+def _activo(client_id: int) -> bool:
+    with Session(engine) as session:
+        return session.get(Client, client_id).activo
+
+
+def test_burst_is_applied_in_one_transaction():
+    queue = JobQueue(MemoryJobBroker(), workers=1, batch_wait=0.2)
+    jobs = [queue.set_activo(Client, [client_id], False) for client_id in (1, 2, 3)]
+    jobs.append(queue.set_activo(Client, [999999], False))
+    queue.start()
+    try:
+        results = _wait(queue, [job["id"] for job in jobs])
+    finally:
+        queue.stop()
+    assert queue.batches == 1
+    assert [job["result"]["updated"] for job in results] == [1, 1, 1, 0]
+    assert results[-1]["result"]["not_found"] == [999999]
+    assert not any(_activo(client_id) for client_id in (1, 2, 3))
+
+
+def test_failed_batch_is_retried_job_by_job():
+    queue = JobQueue(MemoryJobBroker(), workers=1, batch_wait=0.2)
+    good = queue.set_activo(Client, [4], True)
+    bad = queue.submit("client_activo", {"ids": None, "activo": True}, 1)
+    queue.start()
+    try:
+        good_job, bad_job = _wait(queue, [good["id"], bad["id"]])
+    finally:
+        queue.stop()
+    assert good_job["status"] == "done" and good_job["result"]["updated"] == 1
+    assert bad_job["status"] == "failed" and bad_job["error"]
+    assert queue.failed == 1
+
+
+def test_worker_survives_broker_errors():
+    broker = MemoryJobBroker()
+    queue = JobQueue(broker, workers=1, batch_wait=0)
+    finish, calls = broker.finish, []
+
+    def flaky_finish(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        return finish(*args, **kwargs)
+
+    broker.finish = flaky_finish
+    first = queue.set_activo(Client, [5], False)
+    queue.start()
+    try:
+        time.sleep(0.2)
+        second = queue.set_activo(Client, [6], False)
+        (done,) = _wait(queue, [second["id"]])
+    finally:
+        queue.stop()
+    assert done["status"] == "done"
+    assert queue.get(first["id"])["status"] == "running"  # su estado no se pudo guardar
+
+
+def _status(broker, job_id: str) -> str:
+    return broker.get(job_id)["status"]
+
+
+def test_sqlite_broker_requeues_only_expired_leases(tmp_path):
+    broker = SQLiteJobBroker(str(tmp_path / "jobs.db"), lease=10)
+    queue = JobQueue(broker)
+    job = queue.set_activo(Client, [7], False)
+    (taken,) = broker.take(100, 0, timeout=1)
+    assert taken["id"] == job["id"]
+    broker.sweep(time.time() + 5)
+    assert _status(broker, job["id"]) == "running"  # lease vigente
+    broker.sweep(time.time() + 11)
+    assert _status(broker, job["id"]) == "queued"  # lease vencido: su worker murió
+
+
+def test_heartbeat_keeps_a_long_batch_from_running_twice(tmp_path):
+    broker = SQLiteJobBroker(str(tmp_path / "jobs.db"), lease=0.4)
+    queue = JobQueue(broker, workers=1, batch_wait=0)
+    process = queue._process
+
+    def slow_process(batch):
+        time.sleep(1.0)  # lote más largo que el lease
+        process(batch)
+
+    queue._process = slow_process
+    job = queue.set_activo(Client, [8], False)
+    queue.start()
+    try:
+        time.sleep(0.7)
+        broker.sweep()  # otro worker barriendo a mitad del lote
+        assert _status(broker, job["id"]) == "running"
+        (done,) = _wait(queue, [job["id"]])
+    finally:
+        queue.stop()
+    assert done["status"] == "done"
+    assert queue.batches == 1
@@ -0,0 +1,26 @@
+import logging
+
+from logging_config import _DroppingQueueHandler
+
+
+class Mutable:
+    def __init__(self):
+        self.value = "antes"
+
+    def __str__(self):
+        return self.value
+
+
+def test_prepare_freezes_message_and_traceback():
+    handler = _DroppingQueueHandler(None)
+    argument = Mutable()
+    try:
+        1 / 0
+    except ZeroDivisionError as e:
+        record = logging.LogRecord("app", logging.ERROR, __file__, 1, "valor %s", (argument,), (type(e), e, e.__traceback__))
+    prepared = handler.prepare(record)
+    argument.value = "después"
+    assert prepared.getMessage() == "valor antes"
+    assert prepared.args is None and prepared.exc_info is None
+    assert "ZeroDivisionError" in prepared.exc_text
+    assert record.args == (argument,)  # el registro original no se modifica
@@ -0,0 +1,13 @@
+def _types(text: str) -> dict:
+    return {line.split()[2]: line.split()[3] for line in text.splitlines() if line.startswith("# TYPE ")}
+
+
+def test_monotonic_metrics_are_counters(client):
+    client.get("/")
+    types = _types(client.get("/metrics").text)
+    for name in ("auth_cache_hits_total", "record_cache_misses_total", "rate_limit_rejected_total",
+                 "admission_rejected_total", "jobs_done_total", "db_pool_checkouts_total", "db_pool_wait_time_seconds_total"):
+        assert types.get(name) == "counter", name
+    for name in ("auth_cache_size", "jobs_queued_items", "db_pool_checked_out", "revoked_tokens"):
+        assert types.get(name) == "gauge", name
+    assert all(name.endswith("_total") for name, kind in types.items() if kind == "counter")
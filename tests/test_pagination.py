@@ -0,0 +1,45 @@
+import pytest
+from fastapi import HTTPException
+
+from pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    values = {"order_by": "fecha_actualizacion", "value": "2024-01-01T00:00:00", "id": 42}
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == values
+
+
+@pytest.mark.parametrize("cursor", ["no-es-base64!", encode_cursor({"value": 1}), "WzEsMl0"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("order_by", ["id", "fecha_actualizacion"])
+def test_keyset_walk_visits_every_row_once(client, headers, order_by):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 7, "order_by": order_by}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/clients", params=params, headers=headers)
+        assert r.status_code == 200, r.text
+        seen.extend(row["id"] for row in r.json())
+        cursor = r.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+    total = client.get("/clients", params={"limit": 1000}, headers=headers).json()
+    assert sorted(seen) == sorted(row["id"] for row in total)
+    assert len(seen) == len(set(seen))
+
+
+def test_cursor_for_another_order_is_rejected(client, headers):
+    cursor = encode_cursor({"order_by": "fecha_actualizacion", "value": None, "id": 1})
+    r = client.get("/clients", params={"cursor": cursor, "order_by": "id"}, headers=headers)
+    assert r.status_code == 200  # orden por id: sólo usa el id del cursor
+    cursor = encode_cursor({"order_by": "otra", "value": None, "id": 1})
+    r = client.get("/clients", params={"cursor": cursor, "order_by": "fecha_actualizacion"}, headers=headers)
+    assert r.status_code == 400
@@ -0,0 +1,58 @@
+from sqlmodel import Session
+
+from database import engine
+from product_facets import FacetSnapshot, count_facets, facet_values
+from product_search import ProductFilters
+from products import Product
+
+FILTERS = ProductFilters()
+
+
+def _new_product(session) -> Product:
+    product = Product(nombre="test", precio=75.0, activo=True, categoria="test-cat", subcategoria="s", marca="m")
+    session.add(product)
+    return product
+
+
+def test_delta_keeps_snapshot_equal_to_sql():
+    snapshot = FacetSnapshot()
+    with Session(engine) as session:
+        snapshot.get(session, FILTERS)
+        product = _new_product(session)
+        since = snapshot.begin()
+        session.commit()
+        session.refresh(product)
+        snapshot.apply(since, new=facet_values(product))
+        hits = snapshot.hits
+        assert snapshot.get(session, FILTERS) == count_facets(session, FILTERS)
+        assert snapshot.hits == hits + 1  # servido desde la instantánea, sin consulta
+        old = facet_values(product)
+        session.delete(product)
+        since = snapshot.begin()
+        session.commit()
+        snapshot.apply(since, old=old)
+        assert snapshot.get(session, FILTERS) == count_facets(session, FILTERS)
+
+
+def test_snapshot_rebuilt_after_commit_does_not_count_twice():
+    snapshot = FacetSnapshot()
+    with Session(engine) as session:
+        product = _new_product(session)
+        since = snapshot.begin()
+        session.commit()
+        session.refresh(product)
+        snapshot.get(session, FILTERS)  # otro lector reconstruye entre el commit y el delta
+        snapshot.apply(since, new=facet_values(product))
+        assert snapshot.get(session, FILTERS) == count_facets(session, FILTERS)
+        session.delete(product)
+        session.commit()
+
+
+def test_read_during_write_is_not_stored():
+    snapshot = FacetSnapshot()
+    with Session(engine) as session:
+        snapshot.get(session, ProductFilters(categoria="cat1"))
+        snapshot.apply(snapshot.begin())
+        misses = snapshot.misses
+        snapshot.get(session, ProductFilters(categoria="cat1"))
+        assert snapshot.misses == misses + 1  # la escritura invalidó el resultado filtrado
@@ -0,0 +1,31 @@
+# Guardia contra N+1 en las rutas usuario/tareas: el número de sentencias SQL
+# por petición no debe pasar del presupuesto ni crecer con los usuarios o
+# tareas devueltos (la validación del token está cacheada y no cuenta).
+import pytest
+
+from database import count_queries
+
+PARAMS = {"few": "1,2,3", "many": ",".join(str(i) for i in range(1, 201)), "first": 1}
+
+# (ruta con pocos resultados, la misma con muchos o None, máximo de sentencias)
+BUDGETS = [
+    ("/users?ids={few}&include=tasks", "/users?ids={many}&include=tasks", 2),
+    ("/users?ids={few}", "/users?ids={many}", 1),
+    ("/users/{first}", None, 1),
+    ("/users/{first}/tasks", None, 1),
+    ("/tasks/1/users", None, 1),
+    ("/tasks/1/user", None, 1),
+]
+
+
+@pytest.mark.parametrize("small, large, budget", BUDGETS, ids=[small for small, _, _ in BUDGETS])
+def test_query_budget(client, headers, small, large, budget):
+    client.get("/users/1", headers=headers)  # calienta la cache de tokens
+    counts = []
+    for path in filter(None, (small, large)):
+        with count_queries() as queries:
+            r = client.get(path.format(**PARAMS), headers=headers)
+        assert r.status_code == 200, r.text
+        counts.append(queries["count"])
+    assert max(counts) <= budget, f"{small}: {counts} sentencias (máx {budget})"
+    assert len(set(counts)) == 1, f"{small}: crece con el número de filas ({counts})"
@@ -0,0 +1,53 @@
+import pytest
+from fastapi import HTTPException
+
+import ratelimit
+from cache import FakeRedis
+from ratelimit import MemoryRateLimitStore, RateLimiter, RedisRateLimitStore
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit, "time", clock)
+    return clock
+
+
+def test_token_bucket_burst_then_refill(clock):
+    store = MemoryRateLimitStore()
+    assert all(store.hit("k", rate=2, burst=3)[0] for _ in range(3))
+    allowed, retry_after = store.hit("k", rate=2, burst=3)
+    assert not allowed and retry_after == pytest.approx(0.5)
+    clock.now += 0.5
+    assert store.hit("k", rate=2, burst=3)[0]
+    assert store.hit("otra", rate=2, burst=3)[0]  # un bucket por clave
+
+
+def test_sliding_window_weights_previous_window(clock):
+    store = RedisRateLimitStore(FakeRedis())
+    clock.now = 100.0  # ventana de burst/rate = 10 s: [100, 110)
+    assert all(store.hit("k", rate=1, burst=10)[0] for _ in range(10))
+    clock.now = 115.0  # mitad de la ventana siguiente: la anterior pesa 0.5 -> 5 de 10
+    results = [store.hit("k", rate=1, burst=10)[0] for _ in range(6)]
+    assert results == [True] * 5 + [False]
+
+
+def test_limiter_raises_429_with_retry_after(clock):
+    limiter = RateLimiter("test", rate=1, burst=1, store=MemoryRateLimitStore())
+    limiter.check("k")
+    with pytest.raises(HTTPException) as error:
+        limiter.check("k")
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "1"
+    assert limiter.rejected == 1
@@ -0,0 +1,43 @@
+import time
+
+from cache import FakeRedis
+from revocation import RedisRevocationStore, RevocationList
+
+
+def test_revoke_only_once():
+    revoked = RevocationList(bucket_seconds=60)
+    exp = time.time() + 300
+    assert revoked.revoke("a", exp) is True
+    assert revoked.revoke("a", exp) is False
+    assert revoked.is_revoked("a")
+    assert not revoked.is_revoked("b")
+
+
+def test_missing_or_expired_tokens_are_not_revoked():
+    revoked = RevocationList()
+    assert revoked.revoke(None, time.time() + 60) is False
+    assert revoked.revoke("a", None) is False
+    assert revoked.revoke("a", time.time() - 1) is False
+    assert revoked.stats()["size"] == 0
+
+
+def test_purge_drops_expired_buckets():
+    revoked = RevocationList(bucket_seconds=60)
+    now = time.time()
+    revoked.revoke("pronto", now + 30)
+    revoked.revoke("tarde", now + 3600)
+    revoked.purge(now + 120)  # la cubeta de "pronto" ya venció, la de "tarde" no
+    assert not revoked.is_revoked("pronto")
+    assert revoked.is_revoked("tarde")
+
+
+def test_shared_store_revokes_once_across_workers():
+    store = RedisRevocationStore(FakeRedis())
+    worker_a, worker_b = RevocationList(store), RevocationList(store)
+    exp = time.time() + 300
+    assert worker_a.revoke("jti", exp) is True
+    assert worker_b.revoke("jti", exp) is False  # ya revocado por otro worker
+    worker_c = RevocationList(store)
+    worker_c._last_sync = 0
+    worker_c.sync()
+    assert worker_c.is_revoked("jti")